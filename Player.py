@@ -9,19 +9,23 @@
 # Licence:     <your licence>
 #-------------------------------------------------------------------------------
 #!/usr/bin/env python
+from board import Location
+from grid import starts
+from cards import card_mask, cards_in
 
-suspects = {"Mrs. White": (0, 9),
-            "Mr. Green": (0, 14),
-            "Miss Scarlet": (24, 8),
-            "Professor Plum": (19,23),
-            "Colonel Mustard": (17,0),
-            "Ms. Peacock": (6,23)}
+suspects = dict((suspect, Location(*start))
+                for suspect, start in starts.items())
 
 class Player:
-    def __init__(self, character):
+    def __init__(self, character, start=None):
         self.character = character
-        self.position = suspects[character]
-        self.hand = set()
+        self.position = suspects[character] if start is None else start
+        self.hand_mask = 0
+
+    @property
+    def hand(self):
+        """The set of Cards held, built from the hand bitmask"""
+        return cards_in(self.hand_mask)
 
     def addCard(self, card):
-        self.hand.add(card)
+        self.hand_mask |= card_mask([card])
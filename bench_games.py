@@ -0,0 +1,127 @@
+"""Throughput of whole Sleuth games, for sizing servers
+
+Plays fixed-seed batches of games with the scripted players of
+simulation.py, three, four and six players at a time, in this one process:
+each game deals with Deck, seats the players with Sleuth, moves them with
+Board and refutes their suggestions. For each player count the games per
+second, turns per second, percentiles of the time taken by a game and by
+a turn, and the peak resident memory of the process so far are reported:
+
+    python bench_games.py --games 200 --seed 1
+    python bench_games.py --players 6 --profile games.prof
+
+The same seed always plays the same games, so two runs differ only in how
+fast the code under them is. With --profile the batches are run under
+cProfile and the statistics written to a file, for pstats or snakeviz.
+"""
+import argparse
+import cProfile
+import json
+import resource
+import sys
+import time
+
+from loadgen import percentile
+from simulation import DEFAULT_SUSPECTS, play_game
+
+PLAYER_COUNTS = (3, 4, 6)
+PERCENTILES = (50, 90, 99)
+
+
+def peak_rss():
+    """Return the peak resident set size of this process in bytes"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes and macOS bytes.
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def workload(players, games, seed=0):
+    """Play a batch of games of some number of players and return its
+    statistics as a dict"""
+    suspects = DEFAULT_SUSPECTS[:players]
+    game_times = []
+    turn_times = []
+    turns = won = 0
+
+    started = time.perf_counter()
+    for index in range(games):
+        game_started = time.perf_counter()
+        result = play_game(index, seed, suspects, turn_times=turn_times)
+        game_times.append(time.perf_counter() - game_started)
+        turns += result.turns
+        won += result.winner is not None
+    elapsed = time.perf_counter() - started
+
+    return {'players': players,
+            'games': games,
+            'won': won,
+            'turns': turns,
+            'seconds': elapsed,
+            'games_per_second': games / elapsed,
+            'turns_per_second': turns / elapsed,
+            'game_seconds': dict(('p{}'.format(percent),
+                                  percentile(game_times, percent))
+                                 for percent in PERCENTILES),
+            'turn_seconds': dict(('p{}'.format(percent),
+                                  percentile(turn_times, percent))
+                                 for percent in PERCENTILES),
+            'peak_rss_bytes': peak_rss()}
+
+
+def run(player_counts=PLAYER_COUNTS, games=100, seed=0, profile=None):
+    """Play a batch for every player count and return their statistics
+
+    If profile is a cProfile.Profile, the games are played under it.
+    """
+    results = []
+    for players in player_counts:
+        if profile is not None:
+            profile.enable()
+        try:
+            results.append(workload(players, games, seed))
+        finally:
+            if profile is not None:
+                profile.disable()
+    return results
+
+
+def report(result):
+    return ("{players} players: {games} games ({won} won), {turns} turns "
+            "in {seconds:.2f}s, {games_per_second:.1f} games/s, "
+            "{turns_per_second:.0f} turns/s, game p50 {game:.1f} ms "
+            "p99 {game99:.1f} ms, turn p50 {turn:.3f} ms p99 {turn99:.3f} ms, "
+            "peak RSS {rss:.1f} MiB".format(
+                game=result['game_seconds']['p50'] * 1000,
+                game99=result['game_seconds']['p99'] * 1000,
+                turn=result['turn_seconds']['p50'] * 1000,
+                turn99=result['turn_seconds']['p99'] * 1000,
+                rss=result['peak_rss_bytes'] / 2.0 ** 20, **result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=100,
+                        help="games played for each player count")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--players', type=int, action='append',
+                        choices=range(3, len(DEFAULT_SUSPECTS) + 1),
+                        help="a player count to play; may be repeated")
+    parser.add_argument('--output', help="write the results to this file")
+    parser.add_argument('--profile', help="write cProfile statistics here")
+    args = parser.parse_args()
+
+    profile = cProfile.Profile() if args.profile else None
+    results = run(args.players or PLAYER_COUNTS, args.games, args.seed,
+                  profile)
+    for result in results:
+        print(report(result))
+    if args.output:
+        with open(args.output, 'w') as out:
+            json.dump(results, out, indent=1, sort_keys=True)
+            out.write('\n')
+    if profile is not None:
+        profile.dump_stats(args.profile)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+"""Micro-benchmarks of the Board's movement hot paths
+
+Times Board.available_destinations for every roll from 1 to 12, from the
+start square of every suspect and from every door, with the destination
+cache turned off so that the movement engine itself is measured, and once
+more with the cache on. Also times tile_at, adjacent_locations and
+rooms_within over every tile. Each query's peak memory allocation is
+measured with tracemalloc in a separate pass, so tracing does not slow the
+timings down.
+
+Results are written as JSON, one entry per benchmark:
+
+    {"destinations/roll=7": {"calls": 23, "seconds_per_call": 4.1e-05,
+                             "calls_per_second": 24390.2,
+                             "peak_bytes_per_call": 5120}, ...}
+
+along with the time taken by a fixed piece of plain Python, the
+calibration, and may be compared with a stored baseline. Times are scaled
+by the calibrations so that baselines stay useful on a busier or slower
+machine. A benchmark which got slower, or allocates more, by more than the
+tolerance is reported as a regression and the run exits with status 1:
+
+    python bench_movement.py --baseline baselines/movement.json
+    python bench_movement.py --save baselines/movement.json
+"""
+import argparse
+import json
+import platform
+import sys
+import timeit
+import tracemalloc
+
+from board import Board, Location, MAX_ROLL
+from Player import suspects
+
+
+def starts():
+    """Return the start squares of the suspects and every door"""
+    layout = Board.layout()
+    doors = [layout.location(door) for door in sorted(layout.doors)]
+    return sorted(set(suspects.values())) + doors
+
+
+def tiles():
+    layout = Board.layout()
+    return [Location(x, y) for y in range(layout.height)
+            for x in range(layout.width)]
+
+
+def cases():
+    """Return (name, queries) for every benchmark
+
+    queries is a list of functions of no arguments, one per query.
+    """
+    places = starts()
+    everywhere = tiles()
+    accessable = [location for location in everywhere
+                  if Board.is_accessable(location)]
+    none = frozenset()
+
+    def destinations(roll, start):
+        return lambda: Board.available_destinations(roll, start, none)
+
+    benchmarks = [('destinations/roll={}'.format(roll),
+                   [destinations(roll, start) for start in places])
+                  for roll in range(1, MAX_ROLL + 1)]
+    benchmarks.append(('destinations/cached',
+                       [destinations(roll, start) for start in places
+                        for roll in range(1, MAX_ROLL + 1)]))
+    benchmarks.append(('tile_at', [lambda location=location:
+                                   Board.tile_at(location)
+                                   for location in everywhere]))
+    benchmarks.append(('adjacent_locations',
+                       [lambda location=location:
+                        Board.adjacent_locations(location)
+                        for location in everywhere]))
+    benchmarks.append(('rooms_within', [lambda location=location:
+                                        Board.rooms_within(7, location)
+                                        for location in accessable]))
+    return benchmarks
+
+
+def _run(queries):
+    for query in queries:
+        query()
+
+
+def measure(name, queries, repeat=5, number=1):
+    """Time a benchmark and measure the memory its queries allocate"""
+    cache = Board.destination_cache()
+    maxsize = cache.maxsize
+    cached = name.endswith('/cached')
+    if not cached:
+        cache.resize(0)
+    try:
+        if cached:
+            _run(queries)
+        seconds = min(timeit.repeat(lambda: _run(queries), number=number,
+                                    repeat=repeat)) / (number * len(queries))
+
+        tracemalloc.start()
+        try:
+            peaks = []
+            for query in queries:
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                query()
+                peaks.append(tracemalloc.get_traced_memory()[1] - before)
+        finally:
+            tracemalloc.stop()
+    finally:
+        cache.resize(maxsize)
+
+    return {'calls': len(queries),
+            'seconds_per_call': seconds,
+            'calls_per_second': 1 / seconds if seconds else None,
+            'peak_bytes_per_call': sum(peaks) // len(peaks)}
+
+
+def run(repeat=5, number=1, only=None):
+    """Run every benchmark, or those whose names start with only, and
+    return the results as a dict"""
+    return dict((name, measure(name, queries, repeat, number))
+                for name, queries in cases()
+                if only is None or name.startswith(only))
+
+
+def calibrate(repeat=5):
+    """Time a fixed piece of plain Python, as a measure of machine speed"""
+    def work():
+        table = {}
+        for i in range(20000):
+            table[i & 255] = table.get(i & 255, 0) + i
+    return min(timeit.repeat(work, number=1, repeat=repeat))
+
+
+def compare(report, baseline, tolerance=0.5):
+    """Return the regressions of a report against a baseline report
+
+    Each is (name, measure, baseline value, result value) for a time per
+    call or peak allocation more than tolerance above the baseline. Times
+    are first scaled by the calibrations of the two runs, so a machine
+    which is slower overall does not show up as a regression. Benchmarks
+    missing from either side are skipped.
+    """
+    results, stored = report['results'], baseline['results']
+    speed = report.get('calibration', 1.0) / baseline.get('calibration', 1.0)
+    regressions = []
+    for name in sorted(set(results) & set(stored)):
+        for key, scale in (('seconds_per_call', speed),
+                           ('peak_bytes_per_call', 1.0)):
+            old, new = stored[name].get(key), results[name].get(key)
+            if old is not None and new is not None and new > old * scale * (
+                    1 + tolerance):
+                regressions.append((name, key, old, new))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--number', type=int, default=1)
+    parser.add_argument('--only', help="run benchmarks starting with this")
+    parser.add_argument('--output', help="write the results to this file")
+    parser.add_argument('--baseline', help="compare with this file")
+    parser.add_argument('--tolerance', type=float, default=0.5)
+    parser.add_argument('--save', help="write the results as a baseline")
+    args = parser.parse_args()
+
+    calibration = calibrate(args.repeat)
+    results = run(args.repeat, args.number, args.only)
+    report = {'python': platform.python_version(),
+              'machine': platform.machine(),
+              'calibration': min(calibration, calibrate(args.repeat)),
+              'results': results}
+    for path in filter(None, (args.output, args.save)):
+        with open(path, 'w') as out:
+            json.dump(report, out, indent=1, sort_keys=True)
+            out.write('\n')
+    if not args.output:
+        json.dump(report, sys.stdout, indent=1, sort_keys=True)
+        print()
+
+    if args.baseline:
+        with open(args.baseline) as stored:
+            baseline = json.load(stored)
+        regressions = compare(report, baseline, args.tolerance)
+        for name, key, old, new in regressions:
+            print("REGRESSION {} {}: {:.4g} -> {:.4g} ({:+.0%})".format(
+                name, key, old, new, new / old - 1), file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,28 @@
 
 # The namedtuple will be used for handling locations
-from collections import namedtuple
-from grid import grid
+import base64
+import threading
+import weakref
+from types import MappingProxyType
+from collections import OrderedDict, deque, namedtuple
+from heapq import heappop, heappush
+from grid import grid, rooms, starts
 
 
 Location = namedtuple('Location', ['x', 'y'])
 
+# A place a move may end, the steps walked to it and whether it is a door
+Destination = namedtuple('Destination', ['location', 'steps', 'door'])
+
 INACCESSABLE, NORMAL, DOOR_EW, DOOR_NS = range(4)
 
+# The highest roll of two dice
+MAX_ROLL = 12
+
+# The chance of each total of two dice
+ROLL_CHANCES = dict((roll, (6 - abs(roll - 7)) / 36.0)
+                    for roll in range(2, MAX_ROLL + 1))
+
 
 class NotCorrectTileError(Exception):
     """Used to indicate that a tile is not the type of tile expected."""
@@ -21,7 +36,489 @@ class IncompatibleInterfaceException(Exception):
     """Error occurs when receiving an unexpected object"""
 
 
-class Board(object):
+class Layout(object):
+    """A grid compiled into flat tables
+
+    Tiles are numbered row by row, so the tile at (x, y) is number
+    y * width + x. The tile types are kept in a flat string of bytes, and
+    everything a move needs is worked out up front from the tile numbers:
+    the on-board neighbours of each tile, the neighbours which may legally
+    be stepped onto, the walking distances between tiles and, for each
+    tile, masks of the tiles within each distance up to MAX_ROLL.
+
+    rooms maps the number of every door to the name of its room and starts
+    maps each suspect to the number of the tile they start on; they are
+    given as a dict of room names to lists of door (x, y) and a dict of
+    suspects to (x, y). Any which lie off the grid are left out.
+
+    A Layout is never changed once built. Each attribute may be set only
+    once and holds bytes, tuples, frozensets or read only mappings, as
+    does its DistanceTable, so a Layout may be read from any number of
+    threads without locking.
+
+    From the rooms, room_names lists the rooms in order, room_reach holds
+    for each accessable tile the fewest steps from it into each room, in
+    the order of room_names, and room_distances maps each pair of rooms to
+    the fewest steps from a door of the one into the other. Unreachable
+    rooms are DistanceTable.UNREACHABLE steps away.
+    """
+
+    __slots__ = ('grid', 'width', 'height', 'tiles', 'doors', 'neighbours',
+                 'moves', 'distances', 'nearby', 'rooms', 'starts',
+                 'room_names', 'room_reach', 'room_distances')
+
+    def __init__(self, grid, tile_type, rooms=None, starts=None):
+        self.grid = tuple(tuple(row) for row in grid)
+        self.height = len(grid)
+        self.width = len(grid[0])
+        self.tiles = bytes(tile_type[tile] for row in grid for tile in row)
+        self.doors = frozenset(number for number, tile in enumerate(self.tiles)
+                               if tile in (DOOR_EW, DOOR_NS))
+        self.neighbours = tuple(self._adjacent(number)
+                                for number in range(len(self.tiles)))
+        self.moves = tuple(self._legal_moves(number)
+                           for number in range(len(self.tiles)))
+        self.distances = DistanceTable(self)
+        self.nearby = tuple(self._nearby(number)
+                            for number in range(len(self.tiles)))
+        self.rooms = MappingProxyType(dict(
+            (self.number(Location(*door)), room)
+            for room, doors in (rooms or {}).items()
+            for door in doors if self._on_board(door)))
+        self.starts = MappingProxyType(dict(
+            (suspect, self.number(Location(*start)))
+            for suspect, start in (starts or {}).items()
+            if self._on_board(start)))
+        self.room_names = tuple(sorted(set(self.rooms.values())))
+        self.room_reach = tuple(self._room_reach(number)
+                                for number in range(len(self.tiles)))
+        self.room_distances = MappingProxyType(dict(
+            ((room, other), min(self.room_reach[door][i]
+                                for door, name in self.rooms.items()
+                                if name == room))
+            for room in self.room_names
+            for i, other in enumerate(self.room_names) if other != room))
+
+    def __setattr__(self, name, value):
+        if hasattr(self, name):
+            raise AttributeError("Layout is read only")
+        object.__setattr__(self, name, value)
+
+    def __delattr__(self, name):
+        raise AttributeError("Layout is read only")
+
+    def __getstate__(self):
+        # Mapping proxies cannot be pickled, so the dicts behind them are
+        return dict((name, dict(value) if isinstance(value, MappingProxyType)
+                     else value)
+                    for name, value in ((name, getattr(self, name))
+                                        for name in self.__slots__))
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            if isinstance(value, dict):
+                value = MappingProxyType(value)
+            object.__setattr__(self, name, value)
+
+    def to_data(self):
+        """Return the Layout as plain data which JSON can hold
+
+        Strings of bytes are base64 encoded and mappings whose keys are not
+        strings become lists.
+        """
+        return {'grid': [list(row) for row in self.grid],
+                'tiles': base64.b64encode(self.tiles).decode('ascii'),
+                'doors': sorted(self.doors),
+                'neighbours': [list(tiles) for tiles in self.neighbours],
+                'moves': [list(tiles) for tiles in self.moves],
+                'distances': self.distances.to_data(),
+                'nearby': [list(masks) for masks in self.nearby],
+                'rooms': sorted(self.rooms.items()),
+                'starts': dict(self.starts),
+                'room_names': list(self.room_names),
+                'room_reach': [list(reach) for reach in self.room_reach],
+                'room_distances': [[room, other, distance] for
+                                   (room, other), distance in
+                                   sorted(self.room_distances.items())]}
+
+    @classmethod
+    def from_data(cls, data):
+        """Rebuild a Layout from the data of to_data() without compiling it
+
+        Only the shape of the data is checked. Raises ValueError, TypeError
+        or KeyError for data which does not have it.
+        """
+        def ints(values):
+            return tuple(int(value) for value in values)
+
+        grid = tuple(ints(row) for row in data['grid'])
+        layout = cls.__new__(cls)
+        layout.__setstate__({
+            'grid': grid,
+            'width': len(grid[0]),
+            'height': len(grid),
+            'tiles': base64.b64decode(data['tiles'], validate=True),
+            'doors': frozenset(ints(data['doors'])),
+            'neighbours': tuple(ints(tiles) for tiles in data['neighbours']),
+            'moves': tuple(ints(tiles) for tiles in data['moves']),
+            'distances': DistanceTable.from_data(data['distances']),
+            'nearby': tuple(ints(masks) for masks in data['nearby']),
+            'rooms': dict((int(door), str(room))
+                          for door, room in data['rooms']),
+            'starts': dict((str(suspect), int(start))
+                           for suspect, start in data['starts'].items()),
+            'room_names': tuple(str(room) for room in data['room_names']),
+            'room_reach': tuple(ints(reach) for reach in data['room_reach']),
+            'room_distances': dict(((str(room), str(other)), int(distance))
+                                   for room, other, distance
+                                   in data['room_distances'])})
+
+        tiles = len(layout.tiles)
+        if (tiles != layout.width * layout.height or
+                any(len(row) != layout.width for row in grid) or
+                not all(len(table) == tiles for table in (
+                    layout.neighbours, layout.moves, layout.nearby,
+                    layout.room_reach, layout.distances.index))):
+            raise ValueError("Layout data does not fit its grid")
+        return layout
+
+    def _on_board(self, location):
+        x, y = location
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def _adjacent(self, number):
+        x, y = number % self.width, number // self.width
+        return tuple(ay * self.width + ax
+                     for ax, ay in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1))
+                     if 0 <= ax < self.width and 0 <= ay < self.height)
+
+    def _legal_moves(self, number):
+        """Return the numbers of the tiles which may be stepped onto
+
+        A North/South door may only be entered from the tile above or below
+        it and an East/West door only from the tile to its left or right.
+        """
+        moves = []
+        for adjacent in self.neighbours[number]:
+            tile = self.tiles[adjacent]
+            if tile is INACCESSABLE:
+                continue
+            if tile is DOOR_NS and adjacent % self.width != number % self.width:
+                continue
+            if tile is DOOR_EW and adjacent // self.width != number // self.width:
+                continue
+            moves.append(adjacent)
+        return tuple(moves)
+
+    def _nearby(self, number):
+        """Return masks of the tiles within 0 to MAX_ROLL steps of a tile"""
+        if self.tiles[number] is INACCESSABLE:
+            return ()
+
+        masks = [0] * (MAX_ROLL + 1)
+        for other, distance in self.distances.row(number):
+            if distance <= MAX_ROLL:
+                masks[distance] |= 1 << other
+        for distance in range(1, MAX_ROLL + 1):
+            masks[distance] |= masks[distance - 1]
+        return tuple(masks)
+
+    def _room_reach(self, number):
+        """Return the fewest steps from a tile into each room"""
+        if self.tiles[number] is INACCESSABLE:
+            return ()
+
+        reach = dict.fromkeys(self.room_names, DistanceTable.UNREACHABLE)
+        for other, distance in self.distances.row(number):
+            room = self.rooms.get(other)
+            if room is not None and 0 < distance < reach[room]:
+                reach[room] = distance
+        return tuple(reach[room] for room in self.room_names)
+
+    def number(self, location):
+        """Return the number of the tile at a location on the board"""
+        if not (0 <= location.x < self.width and 0 <= location.y < self.height):
+            raise IndexError("Location ({}, {}) is not on the board".format(
+                location.x, location.y))
+        return location.y * self.width + location.x
+
+    def location(self, number):
+        """Return the Location of a numbered tile"""
+        return Location(number % self.width, number // self.width)
+
+
+class DistanceTable(object):
+    """Shortest legal walking distances between every pair of tiles
+
+    The accessable tiles of a Layout are indexed densely. The distances are
+    kept in a flat, read only string of bytes with one row per starting tile,
+    so the distance from the tile at index i to the tile at index j is found
+    at i * size + j. Walks obey the same rules as a move: doors are entered
+    only from the proper side and a walk ends as soon as it enters a door.
+    Other players are not taken into account.
+
+    Tiles are given and returned by their Layout numbers.
+    """
+
+    UNREACHABLE = 255
+
+    def __init__(self, layout):
+        self.width = layout.width
+        self.tiles = tuple(number for number, tile in enumerate(layout.tiles)
+                           if tile is not INACCESSABLE)
+        index = [-1] * len(layout.tiles)
+        for i, number in enumerate(self.tiles):
+            index[number] = i
+        self.index = tuple(index)
+        self.doors = tuple(i for i, number in enumerate(self.tiles)
+                           if number in layout.doors)
+        self.size = len(self.tiles)
+
+        table = bytearray([self.UNREACHABLE]) * (self.size ** 2)
+        for start in range(self.size):
+            self._walk(layout, start, table)
+        self._table = bytes(table)
+
+    def __setattr__(self, name, value):
+        if name in self.__dict__:
+            raise AttributeError("DistanceTable is read only")
+        object.__setattr__(self, name, value)
+
+    def to_data(self):
+        """Return the table as plain data which JSON can hold"""
+        return {'width': self.width,
+                'tiles': list(self.tiles),
+                'index': list(self.index),
+                'doors': list(self.doors),
+                'table': base64.b64encode(self._table).decode('ascii')}
+
+    @classmethod
+    def from_data(cls, data):
+        """Rebuild a table from the data of to_data() without walking it"""
+        table = cls.__new__(cls)
+        table.__dict__.update(
+            width=int(data['width']),
+            tiles=tuple(int(number) for number in data['tiles']),
+            index=tuple(int(i) for i in data['index']),
+            doors=tuple(int(i) for i in data['doors']),
+            _table=base64.b64decode(data['table'], validate=True))
+        table.__dict__['size'] = len(table.tiles)
+        if len(table._table) != table.size ** 2:
+            raise ValueError("Distance data does not fit its tiles")
+        return table
+
+    def _walk(self, layout, start, table):
+        """Fill in the row of the table for a starting tile"""
+        row = start * self.size
+        table[row + start] = 0
+        queue = deque([start])
+        while queue:
+            i = queue.popleft()
+            if i != start and self.tiles[i] in layout.doors:
+                continue
+
+            distance = table[row + i] + 1
+            for step in layout.moves[self.tiles[i]]:
+                j = self.index[step]
+                if table[row + j] == self.UNREACHABLE:
+                    table[row + j] = min(distance, self.UNREACHABLE - 1)
+                    queue.append(j)
+
+    def distance(self, start, end):
+        """Return the walking distance between two tiles
+
+        None is returned if the end cannot be walked to at all. Raises a
+        NotCorrectTileError if either tile is not accessable.
+        """
+        distance = self._table[self._index_of(start) * self.size +
+                               self._index_of(end)]
+        if distance == self.UNREACHABLE:
+            return None
+        return distance
+
+    def row(self, start):
+        """Yield (tile, distance) for every tile which can be walked to"""
+        row = self._index_of(start) * self.size
+        for i, number in enumerate(self.tiles):
+            if self._table[row + i] != self.UNREACHABLE:
+                yield number, self._table[row + i]
+
+    def doors_within(self, roll, start):
+        """Return the set of doors which can be entered with the given roll"""
+        row = self._index_of(start) * self.size
+        return {self.tiles[door] for door in self.doors
+                if 0 < self._table[row + door] <= roll}
+
+    def _index_of(self, number):
+        i = self.index[number]
+        if i < 0:
+            raise NotCorrectTileError("Given tile ({}, {}) not accessable".format(
+                number % self.width, number // self.width))
+        return i
+
+
+class _CacheStore(object):
+    """The entries and counters of a DestinationCache for one thread"""
+
+    __slots__ = ('generation', 'layout', 'entries', 'hits', 'misses',
+                 'evictions', '__weakref__')
+
+    def __init__(self, generation):
+        self.generation = generation
+        self.layout = None
+        self.entries = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+
+
+class DestinationCache(object):
+    """A bounded, least recently used cache of destination sets
+
+    Entries belong to the Layout they were worked out for. The cache is
+    emptied whenever it is used with a different layout, so swapping the
+    board never brings back destinations from the old one. Counts of hits,
+    misses and evictions are kept for monitoring.
+
+    Every thread has a store of its own, holding up to maxsize entries, so
+    threads never wait on one another or see each other's entries half
+    written. The counters are the totals over the threads still running.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._local = threading.local()
+        self._stores = weakref.WeakSet()
+        # Taken only to add a thread's store or to look over all of them
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    def __len__(self):
+        return len(self._store().entries)
+
+    @property
+    def hits(self):
+        return self._total('hits')
+
+    @property
+    def misses(self):
+        return self._total('misses')
+
+    @property
+    def evictions(self):
+        return self._total('evictions')
+
+    def get(self, layout, key):
+        """Return the entry for a key, or None if there is none"""
+        store = self._store()
+        if layout is not store.layout:
+            store.entries.clear()
+            store.layout = layout
+
+        try:
+            destinations = store.entries[key]
+        except KeyError:
+            store.misses += 1
+            return None
+
+        store.entries.move_to_end(key)
+        store.hits += 1
+        return destinations
+
+    def put(self, layout, key, destinations):
+        """Store an entry, evicting the least recently used if full"""
+        store = self._store()
+        if layout is not store.layout or self.maxsize <= 0:
+            return
+
+        store.entries[key] = destinations
+        store.entries.move_to_end(key)
+        self._evict(store)
+
+    def resize(self, maxsize):
+        """Change the number of entries kept, evicting any excess
+
+        The stores of other threads are cut down the next time they are
+        used.
+        """
+        self.maxsize = maxsize
+        self._evict(self._store())
+
+    def clear(self):
+        """Drop every entry and reset the counters, in every thread"""
+        with self._lock:
+            self._generation += 1
+        self._store()
+
+    def stats(self):
+        """Return the size and counters of the cache as a dict
+
+        The size is that of the calling thread's store.
+        """
+        return {'size': len(self),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions}
+
+    def _store(self):
+        """Return the calling thread's store, made fresh if the cache was
+        cleared since it was last used"""
+        try:
+            store = self._local.store
+        except AttributeError:
+            store = None
+        generation = self._generation
+        if store is None or store.generation != generation:
+            store = self._local.store = _CacheStore(generation)
+            with self._lock:
+                self._stores.add(store)
+        elif len(store.entries) > self.maxsize:
+            self._evict(store)
+        return store
+
+    def _total(self, counter):
+        with self._lock:
+            stores = list(self._stores)
+        generation = self._generation
+        return sum(getattr(store, counter) for store in stores
+                   if store.generation == generation)
+
+    def _evict(self, store):
+        while len(store.entries) > max(self.maxsize, 0):
+            store.entries.popitem(last=False)
+            store.evictions += 1
+
+
+class CompiledBoard(type):
+    """Keeps the Layout of a board in step with its grid
+
+    The layout is compiled when a board class is created and again whenever
+    its grid, tile types, rooms or start squares are replaced, so lookups
+    never need to check whether it is stale. A class created with a
+    _layout of its own, such as one loaded from the board cache, is not
+    compiled again.
+
+    A new Layout is built in full before it replaces the old one in a
+    single assignment, and the Board's methods read the layout once per
+    call, so a query running in another thread sees either the old board
+    or the new one and never a mixture.
+    """
+
+    def __init__(cls, name, bases, attributes):
+        super(CompiledBoard, cls).__init__(name, bases, attributes)
+        if '_layout' not in attributes:
+            cls._compile()
+
+    def __setattr__(cls, name, value):
+        super(CompiledBoard, cls).__setattr__(name, value)
+        if name in ('_grid', '_tile_type', '_rooms', '_starts'):
+            cls._compile()
+
+    def _compile(cls):
+        type.__setattr__(cls, '_layout', Layout(cls._grid, cls._tile_type,
+                                                cls._rooms, cls._starts))
+
+
+class Board(object, metaclass=CompiledBoard):
     """The board on which the Sleuth game is played
 
     The Board is a singleton with only class methods and attributes. This
@@ -36,19 +533,36 @@ class Board(object):
 
     _grid = grid
 
+    _rooms = rooms
+
+    _starts = starts
+
+    _cache = DestinationCache()
+
+    _chances = DestinationCache(maxsize=64)
+
     def __new__(cls, *args, **kwargs):
         raise ShouldNotBeInstantiated("Board should not be instantiated")
 
+    @classmethod
+    def layout(cls):
+        """Return the Layout compiled from the grid"""
+        return cls._layout
+
     @classmethod
     def tile_at(cls, location):
         """Determine the type of tile at a given location on the board."""
+        layout = cls._layout
         try:
-            tile = cls._grid[location.y][location.x]
-            return cls._tile_type[tile]
+            x, y = location.x, location.y
         except AttributeError:
             raise IncompatibleInterfaceException("Expected an object with "
                                                  "'x', and 'y' attributes")
 
+        if 0 <= x < layout.width and 0 <= y < layout.height:
+            return layout.tiles[y * layout.width + x]
+        raise IndexError("Location ({}, {}) is not on the board".format(x, y))
+
     @classmethod
     def is_accessable(cls, location):
         """Determines if a tile is an accessable tile"""
@@ -57,9 +571,10 @@ class Board(object):
     @classmethod
     def in_board(cls, location):
         """Determines if a location is inside of the board dimensions"""
+        layout = cls._layout
         try:
-            return (0 <= location.x < len(cls._grid[0]) and
-                    0 <= location.y < len(cls._grid))
+            return (0 <= location.x < layout.width and
+                    0 <= location.y < layout.height)
         except AttributeError:
             raise IncompatibleInterfaceException("Expected an object with "
                                                  "'x', and 'y' attributes")
@@ -77,7 +592,7 @@ class Board(object):
         tile_type = cls.tile_at(door_location)
 
         try:
-            if not cls.is_door(door_location):
+            if tile_type not in (DOOR_EW, DOOR_NS):
                 raise NotCorrectTileError("Given tile ({}, {}) not a door".format(
                     door_location.x, door_location.y))
 
@@ -99,48 +614,408 @@ class Board(object):
         """Determine if a given location is a door"""
         return cls.tile_at(location) in (DOOR_EW, DOOR_NS)
 
+    @classmethod
+    def room_of(cls, location):
+        """Return the name of the room a door leads into, or None if the
+        location is not a door of a room"""
+        layout = cls._layout
+        return layout.rooms.get(layout.number(location))
+
+    @classmethod
+    def room_names(cls):
+        """Return the names of the rooms of the board, in order"""
+        return cls._layout.room_names
+
+    @classmethod
+    def room_doors(cls, room):
+        """Return the Locations of the doors of a room, in order"""
+        layout = cls._layout
+        return [layout.location(door) for door in sorted(layout.rooms)
+                if layout.rooms[door] == room]
+
+    @classmethod
+    def room_distance(cls, room, other):
+        """Determine the fewest steps from a door of one room into another
+
+        Returns None if the other room cannot be reached. Other players are
+        not considered.
+        """
+        distance = cls._layout.room_distances[room, other]
+        if distance == DistanceTable.UNREACHABLE:
+            return None
+        return distance
+
+    @classmethod
+    def rooms_within(cls, roll, start_location, exclude=()):
+        """Determine the rooms which may be entered with the given roll
+
+        Returns the set of the names of the rooms with a door among the
+        available destinations. The answer comes from the fewest steps
+        from the start into each room, compiled with the layout; only when
+        an excluded location is near enough to be in the way is the move
+        worked out in full. The layout only records which tiles lie within
+        MAX_ROLL steps, so for a longer roll any excluded tile on the board
+        may be in the way.
+        """
+        layout = cls._layout
+        start = cls._number(layout, start_location)
+        reach = layout.room_reach[start]
+        if not reach:
+            raise NotCorrectTileError("Given tile ({}, {}) not accessable"
+                                      .format(*start_location))
+
+        blocked = cls._blocked(layout, exclude)
+        if blocked and (roll > MAX_ROLL or
+                        blocked & layout.nearby[start][roll]):
+            return {layout.rooms[number] for number in
+                    cls._destinations(layout, roll, start, blocked)
+                    if number in layout.rooms and number != start}
+        return {room for room, distance in zip(layout.room_names, reach)
+                if distance <= roll}
+
+    @classmethod
+    def start(cls, suspect):
+        """Return the Location a suspect starts the game on"""
+        layout = cls._layout
+        return layout.location(layout.starts[suspect])
+
+    @classmethod
+    def distance_table(cls):
+        """Return the DistanceTable compiled for the board"""
+        return cls._layout.distances
+
+    @classmethod
+    def distance(cls, start_location, end_location):
+        """Determine the fewest tiles walked to get from one tile to another
+
+        Door entry rules apply, but other players are not considered. None
+        is returned if the end cannot be walked to.
+        """
+        layout = cls._layout
+        return layout.distances.distance(cls._number(layout, start_location),
+                                         cls._number(layout, end_location))
+
+    @classmethod
+    def path_to(cls, start_location, door_location, exclude=()):
+        """Find a shortest walk from a tile into a door
+
+        Returns the Locations walked, from the start to the door, or None
+        if the door cannot be reached without crossing an excluded tile.
+        Door entry rules apply and no other door is walked through, as
+        entering one ends a move.
+
+        The search is an A* search guided by the walking distances compiled
+        with the layout. They ignore other players and so never overstate
+        the steps left; when nobody is in the way they are exact, and only
+        the tiles along a shortest walk are looked at.
+
+        Raises a NotCorrectTileError if the start is not accessable or the
+        door is not a door.
+        """
+        layout = cls._layout
+        start = cls._number(layout, start_location)
+        goal = cls._number(layout, door_location)
+        if goal not in layout.doors:
+            raise NotCorrectTileError("Given tile ({}, {}) not a door".format(
+                door_location.x, door_location.y))
+
+        distances, doors = layout.distances, layout.doors
+        blocked = cls._blocked(layout, exclude)
+        estimate = distances.distance(start, goal)
+        if estimate is None or blocked >> goal & 1:
+            return None
+
+        previous = {start: None}
+        walked = {start: 0}
+        # Of moves as promising, those further along are tried first
+        queue = [(estimate, 0, start)]
+        while queue:
+            _, behind, number = heappop(queue)
+            if number == goal:
+                path = []
+                while number is not None:
+                    path.append(layout.location(number))
+                    number = previous[number]
+                return path[::-1]
+            if -behind > walked[number]:
+                continue
+
+            steps = walked[number] + 1
+            for step in layout.moves[number]:
+                if (blocked >> step & 1 or step in doors and step != goal or
+                        walked.get(step, steps + 1) <= steps):
+                    continue
+                remaining = distances.distance(step, goal)
+                if remaining is None:
+                    continue
+                walked[step] = steps
+                previous[step] = number
+                heappush(queue, (steps + remaining, -steps, step))
+        return None
+
+    @classmethod
+    def within_reach(cls, roll, start_location, location):
+        """Determine if a tile is no further away than the given roll
+
+        For a door this is exactly whether it may be entered this turn when
+        nobody is in the way, as entering a door ends a move early. Other
+        tiles must also be landed on with the whole roll, so for them this
+        is only a quick test that rules destinations out.
+        """
+        distance = cls.distance(start_location, location)
+        return distance is not None and distance <= roll
+
+    @classmethod
+    def doors_within(cls, roll, start_location):
+        """Determine the doors which may be entered with the given roll
+
+        Other players are not considered.
+        """
+        layout = cls._layout
+        return {layout.location(door) for door in
+                layout.distances.doors_within(
+                    roll, cls._number(layout, start_location))}
+
     @classmethod
     def available_destinations(cls, roll, start_location, exclude):
         """Determine the places to which a player may move
 
         Given a Location from which to start and a roll representing the
         times a player may traverse tiles, determines the legal destinations
-        and returns them in a set recursively.
+        and returns them in a set.
 
         Locations in the exclude set will be excluded from the legal
         destinations.
+
+        Results are kept in the board's DestinationCache. Excluded tiles
+        further than the roll from the start cannot change the result, so
+        they are left out of the cache key.
         """
         if roll == 0:
             return {start_location}
 
-        legal_moves = set()
-        for location in cls.adjacent_locations(start_location):
+        layout = cls._layout
+        start = cls._number(layout, start_location)
+        blocked = cls._blocked(layout, exclude)
+        cache = cls._cache
+        if cache.maxsize <= 0:
+            return {layout.location(number) for number in
+                    cls._destinations(layout, roll, start, blocked)}
 
-            if location in exclude:
-                continue
+        if 0 < roll <= MAX_ROLL and layout.nearby[start]:
+            blocked &= layout.nearby[start][roll]
+        key = (start, roll, blocked)
+        destinations = cache.get(layout, key)
+        if destinations is None:
+            destinations = frozenset(
+                layout.location(number) for number in
+                cls._destinations(layout, roll, start, blocked))
+            cache.put(layout, key, destinations)
+        return set(destinations)
 
-            if not cls.in_board(location) or not cls.is_accessable(location):
-                continue
+    @classmethod
+    def reach_chances(cls, start_location, exclude=()):
+        """Determine the chance of being able to move to each tile
 
-            if (cls.is_door(location) and
-                    not cls.door_accessable(start_location, location)):
-                continue
+        Returns a dict mapping every Location which is among the available
+        destinations for at least one roll of two dice to the chance that
+        it is, over the rolls 2 to 12. All the rolls are worked out in one
+        walk from the start, reading each roll's destinations off as the
+        walk passes it.
 
-            if cls.is_door(location):
-                destinations = {location}
-            else:
-                destinations = cls.available_destinations(
-                    roll - 1, location, exclude.union({start_location}))
-
-            #Bob:
-            # I'm not sure, I'd think we want only the one object returned.
-            # I don't think mutating the original really hurts anything?
-            # All we're doing is adding to it, and duplicates get pruned
-            # by it being a set. I'll ask about this when we meet.
-            # What's here works, but it might be less efficent.
-
-            legal_moves.update(destinations)
-        return legal_moves
+        The maps from the start squares of the suspects are kept, in their
+        own cache, for each arrangement of excluded tiles near enough to
+        matter.
+        """
+        layout = cls._layout
+        start = cls._number(layout, start_location)
+        nearby = layout.nearby[start]
+        if not nearby:
+            raise NotCorrectTileError("Given tile ({}, {}) not accessable"
+                                      .format(*start_location))
+        blocked = cls._blocked(layout, exclude) & nearby[MAX_ROLL]
+
+        cached = start in layout.starts.values()
+        if cached:
+            chances = cls._chances.get(layout, (start, blocked))
+            if chances is not None:
+                return dict(chances)
+
+        chances = {}
+        entered = set()
+        layers = cls._layers(layout, MAX_ROLL, start, blocked)
+        for roll, (doors, reached) in enumerate(layers, 1):
+            entered.update(doors)
+            if roll in ROLL_CHANCES:
+                for number in entered.union(reached):
+                    chances[number] = chances.get(number, 0) + ROLL_CHANCES[roll]
+        chances = dict((layout.location(number), chance)
+                       for number, chance in chances.items())
+
+        if cached:
+            cls._chances.put(layout, (start, blocked),
+                             tuple(chances.items()))
+        return chances
+
+    @classmethod
+    def stream_destinations(cls, roll, start_location, exclude=()):
+        """Yield the places to which a player may move, nearest first
+
+        Yields a Destination for each of the available destinations, in
+        the order of the steps walked to reach them: each door as soon as
+        the walk first enters it and, once the whole roll has been walked,
+        the tiles on which the move may end. The walk goes no further than
+        the caller reads, so stopping at the first door found skips the
+        rest of the search. The destinations are those of
+        available_destinations, which the cache is not used for.
+        """
+        layout = cls._layout
+        start = cls._number(layout, start_location)
+        if roll == 0:
+            yield Destination(start_location, 0, start in layout.doors)
+            return
+
+        blocked = cls._blocked(layout, exclude)
+        seen = set()
+        reached = ()
+        for steps, (entered, reached) in enumerate(
+                cls._layers(layout, roll, start, blocked), 1):
+            for number in sorted(entered - seen):
+                seen.add(number)
+                yield Destination(layout.location(number), steps, True)
+        for number in sorted(reached):
+            yield Destination(layout.location(number), roll, False)
+
+    @classmethod
+    def destination_cache(cls):
+        """Return the DestinationCache used by available_destinations
+
+        Its size may be changed with resize; a size of zero turns caching
+        off.
+        """
+        return cls._cache
+
+    @classmethod
+    def batch_destinations(cls, requests):
+        """Determine the destinations for many requests at once
+
+        Each request is a (start_location, roll, exclude) triple. Requests
+        which share a start and excluded tiles share a single search, run
+        for the largest of their rolls, and the destinations of each smaller
+        roll are read off as the search passes it.
+
+        Returns a dict mapping (start_location, roll, frozenset(exclude)) to
+        the set of destinations for that request.
+        """
+        layout = cls._layout
+        searches = {}
+        for start_location, roll, exclude in requests:
+            exclude = frozenset(exclude)
+            search = (cls._number(layout, start_location),
+                      cls._blocked(layout, exclude))
+            searches.setdefault(search, {}).setdefault(roll, set()).add(
+                (start_location, roll, exclude))
+
+        results = {}
+        for (start, blocked), rolls in searches.items():
+            destinations = set()
+            layers = cls._layers(layout, max(rolls), start, blocked)
+            for roll, (entered, reached) in enumerate(layers, 1):
+                destinations.update(entered)
+                if roll in rolls:
+                    locations = {layout.location(number)
+                                 for number in destinations.union(reached)}
+                    for request in rolls.pop(roll):
+                        results[request] = set(locations)
+
+            # Rolls of zero or less never start a search
+            for pending in rolls.values():
+                for request in pending:
+                    start_location, roll, exclude = request
+                    results[request] = cls.available_destinations(
+                        roll, start_location, exclude)
+        return results
+
+    @classmethod
+    def _destinations(cls, layout, roll, start, blocked):
+        """Determine the numbers of the tiles to which a player may move
+
+        Tiles whose bits are set in blocked may not be walked over.
+        """
+        destinations = set()
+        reached = set()
+        for entered, reached in cls._layers(layout, roll, start, blocked):
+            destinations.update(entered)
+        return destinations.union(reached)
+
+    @classmethod
+    def _layers(cls, layout, roll, start, blocked):
+        """Walk out from a tile one step at a time, up to the given roll
+
+        For each step, yields the doors entered on that step and the tiles
+        on which a move of exactly that many steps may end. The destinations
+        for any roll up to the given one are the doors entered up to and
+        including that step together with the tiles reached on it.
+        """
+        frontier = {(start, 0)}
+        for remaining in range(roll - 1, -1, -1):
+            entered, frontier = cls._expand(layout, frontier, remaining,
+                                            blocked)
+            yield entered, {number for number, _ in frontier}
+
+    @staticmethod
+    def _expand(layout, frontier, remaining, blocked):
+        """Take one more step from every partial move in a frontier
+
+        Moves are explored breadth first, one tile per layer. A tile may not
+        be walked over twice in a single move, so every partial move is a
+        (tile, walked) pair carrying a mask of the tiles it has walked over.
+        Tiles further than the remaining roll can never be walked over
+        again, so they are dropped from the mask, and partial moves which
+        end on the same tile with the same mask are merged. This keeps each
+        layer small. Entering a door ends the move.
+
+        Returns the set of doors entered and the next frontier.
+        """
+        moves, doors, nearby = layout.moves, layout.doors, layout.nearby
+        entered = set()
+        next_frontier = set()
+        for number, walked in frontier:
+            walked |= 1 << number
+            avoid = walked | blocked
+            for step in moves[number]:
+                if avoid >> step & 1:
+                    continue
+
+                if step in doors:
+                    entered.add(step)
+                elif remaining <= MAX_ROLL:
+                    next_frontier.add((step, walked & nearby[step][remaining]))
+                else:
+                    next_frontier.add((step, walked))
+        return entered, next_frontier
+
+    @staticmethod
+    def _number(layout, location):
+        """Return the Layout number of the tile at a location"""
+        try:
+            return layout.number(location)
+        except AttributeError:
+            raise IncompatibleInterfaceException("Expected an object with "
+                                                 "'x', and 'y' attributes")
+
+    @staticmethod
+    def _blocked(layout, exclude):
+        """Return a mask of the on-board tiles among the excluded locations"""
+        blocked = 0
+        for location in exclude:
+            try:
+                x, y = location
+                if 0 <= x < layout.width and 0 <= y < layout.height:
+                    blocked |= 1 << (y * layout.width + x)
+            except (TypeError, ValueError):
+                continue
+        return blocked
 
     @classmethod
     def adjacent_locations(cls, location):
@@ -0,0 +1,231 @@
+"""Board definitions loaded from files, compiled once and cached on disk
+
+A board definition is a JSON file such as maps/classic.json:
+
+    {"name": "classic",
+     "grid": ["000000000100001000000000", ...],
+     "rooms": {"Kitchen": [[4, 6]], ...},
+     "starts": {"Mrs. White": [9, 0], ...}}
+
+Each row of the grid is a string of tile codes as in grid.py: 0 for an
+inaccessable tile, 1 for a normal tile, 2 for an East/West door and 3 for
+a North/South door. rooms gives the door tiles of each room, named as on
+its room card, and starts the tile each suspect starts on.
+
+load() returns a Board class for a definition. Compiling the Layout of a
+board takes a while, so the compiled Layout is written as JSON into a
+cache directory under the SHA-256 hash of the definition, and loading the
+same board again, in this process or any other, reads it back instead.
+Cached files hold only data. One which cannot be read, is not for the
+definition being loaded or does not fit its grid is ignored and the board
+compiled again.
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+from board import (INACCESSABLE, MAX_ROLL, Board, DestinationCache, Layout,
+                   Location)
+from cards import roomCards, suspectCards
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'SLEUTH_BOARD_CACHE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'sleuth-boards'))
+
+# Part of every hash, so that a change to what a Layout holds never brings
+# back layouts compiled before it.
+_COMPILED_VERSION = 'layout-5-roll-{}'.format(MAX_ROLL)
+
+_ROOMS = [name for name, _ in roomCards]
+_SUSPECTS = [name for name, _ in suspectCards]
+
+_boards = {}
+
+
+class BoardDefinitionError(Exception):
+    """Raised for a board definition which cannot be used"""
+
+
+def definition_of(board=Board, name='classic'):
+    """Return the definition of a Board class as a dict"""
+    return {'name': name,
+            'grid': [''.join(str(tile) for tile in row)
+                     for row in board._grid],
+            'rooms': dict((room, [list(door) for door in doors])
+                          for room, doors in board._rooms.items()),
+            'starts': dict((suspect, list(start))
+                           for suspect, start in board._starts.items())}
+
+
+def dump(path, board=Board, name='classic'):
+    """Write the definition of a Board class to a file"""
+    with open(path, 'w') as definition:
+        json.dump(definition_of(board, name), definition, indent=1,
+                  sort_keys=True)
+        definition.write('\n')
+
+
+def parse(definition):
+    """Check a definition dict and return it with its parts as tuples
+
+    Raises BoardDefinitionError for anything a board cannot be built from.
+    """
+    try:
+        name = str(definition['name'])
+        grid = tuple(tuple(int(tile) for tile in row)
+                     for row in definition['grid'])
+        rooms = dict((room, tuple(Location(*door) for door in doors))
+                     for room, doors in definition['rooms'].items())
+        starts = dict((suspect, Location(*start))
+                      for suspect, start in definition['starts'].items())
+    except (KeyError, TypeError, ValueError, AttributeError) as error:
+        raise BoardDefinitionError("Malformed board definition: {}".format(
+            error))
+
+    if not grid or any(len(row) != len(grid[0]) for row in grid):
+        raise BoardDefinitionError("The grid must be a non-empty rectangle")
+    if any(tile not in Board._tile_type for row in grid for tile in row):
+        raise BoardDefinitionError("Unknown tile code in the grid")
+
+    def tile(location):
+        if not (0 <= location.x < len(grid[0]) and 0 <= location.y < len(grid)):
+            raise BoardDefinitionError("{} is not on the board".format(
+                tuple(location)))
+        return Board._tile_type[grid[location.y][location.x]]
+
+    doors = set()
+    for room, room_doors in rooms.items():
+        if room not in _ROOMS:
+            raise BoardDefinitionError("Unknown room {!r}".format(room))
+        for door in room_doors:
+            if tile(door) is INACCESSABLE or grid[door.y][door.x] < 2:
+                raise BoardDefinitionError("{} of the {} is not a door".format(
+                    tuple(door), room))
+            if door in doors:
+                raise BoardDefinitionError("{} is a door of two rooms".format(
+                    tuple(door)))
+            doors.add(door)
+    for y, row in enumerate(grid):
+        for x, code in enumerate(row):
+            if code >= 2 and Location(x, y) not in doors:
+                raise BoardDefinitionError("The door at {} has no room".format(
+                    (x, y)))
+
+    if sorted(starts) != sorted(_SUSPECTS):
+        raise BoardDefinitionError("Every suspect needs one start square")
+    for suspect, start in starts.items():
+        if tile(start) is INACCESSABLE:
+            raise BoardDefinitionError("{} starts on an inaccessable tile"
+                                       .format(suspect))
+
+    return {'name': name, 'grid': grid, 'rooms': rooms, 'starts': starts}
+
+
+def digest(definition):
+    """Return the hex SHA-256 hash of a parsed definition"""
+    content = json.dumps([_COMPILED_VERSION, definition['grid'],
+                          sorted(definition['rooms'].items()),
+                          sorted(definition['starts'].items())])
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def compile_board(definition, cache_dir=DEFAULT_CACHE_DIR):
+    """Return a Board class for a parsed definition
+
+    The Layout is read from cache_dir if it was compiled before, and
+    otherwise compiled and written there. A cache_dir of None compiles
+    without touching the disk. Boards are also remembered in the process,
+    so the same definition always gives the same class.
+    """
+    key = digest(definition)
+    if key in _boards:
+        return _boards[key]
+
+    grid = [list(row) for row in definition['grid']]
+    rooms = dict((room, [tuple(door) for door in doors])
+                 for room, doors in definition['rooms'].items())
+    starts = dict((suspect, tuple(start))
+                  for suspect, start in definition['starts'].items())
+
+    layout = None
+    path = None
+    if cache_dir is not None:
+        path = os.path.join(cache_dir, key + '.json')
+        layout = _read(path, key, definition)
+
+    if layout is None:
+        layout = Layout(grid, Board._tile_type, rooms, starts)
+        if path is not None:
+            _write(path, key, layout)
+
+    board = type(Board)(str('Board_' + definition['name']), (Board,), {
+        '__doc__': "The {} board".format(definition['name']),
+        '_grid': grid,
+        '_rooms': rooms,
+        '_starts': starts,
+        '_layout': layout,
+        '_cache': DestinationCache(),
+        '_chances': DestinationCache(maxsize=64),
+    })
+    _boards[key] = board
+    return board
+
+
+def _read(path, key, definition):
+    """Read a compiled Layout from the cache
+
+    Returns None unless the file holds a Layout compiled for the
+    definition.
+    """
+    try:
+        with open(path) as cached:
+            data = json.load(cached)
+        if data['key'] != key:
+            return None
+        layout = Layout.from_data(data['layout'])
+        width = layout.width
+        rooms = dict((door.y * width + door.x, room)
+                     for room, doors in definition['rooms'].items()
+                     for door in doors)
+        starts = dict((suspect, start.y * width + start.x)
+                      for suspect, start in definition['starts'].items())
+        tiles = bytes(Board._tile_type[tile]
+                      for row in definition['grid'] for tile in row)
+        if (layout.grid != tuple(definition['grid']) or
+                layout.tiles != tiles or layout.rooms != rooms or
+                layout.starts != starts):
+            return None
+        return layout
+    except Exception:
+        # A cache file which cannot be used is only a cache miss
+        return None
+
+
+def _write(path, key, layout):
+    """Write a compiled Layout to the cache, all at once"""
+    directory = os.path.dirname(path)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        handle, temporary = tempfile.mkstemp(dir=directory)
+    except OSError:
+        # The cache is only an optimization; a board which cannot be cached
+        # is simply compiled again next time.
+        return
+    try:
+        with os.fdopen(handle, 'w') as cached:
+            json.dump({'key': key, 'layout': layout.to_data()}, cached)
+        os.replace(temporary, path)
+    except OSError:
+        os.remove(temporary)
+
+
+def load(path, cache_dir=DEFAULT_CACHE_DIR):
+    """Load a board definition from a JSON file and return its Board class"""
+    try:
+        with open(path) as definition:
+            data = json.load(definition)
+    except ValueError as error:
+        raise BoardDefinitionError("{} is not valid JSON: {}".format(
+            path, error))
+    return compile_board(parse(data), cache_dir)
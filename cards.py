@@ -0,0 +1,51 @@
+"""The cards of the Sleuth game
+
+Every card is built once, in CARDS, and shared by every deck and game. A
+card's position in CARDS is its bit in a card bitmask, so a hand or a
+solution fits in a single int and checking a suggestion against it is a
+single bitwise and.
+"""
+from collections import namedtuple
+
+weaponCards = [("Lead Pipe", "w"), ("Candlestick", "w"), ("Revolver", "w"), ("Rope" , "w"), ("Knife", "w"), ("Wrench", "w")]
+roomCards = [("Conservatory", "r"), ("Kitchen", "r"), ("Billards Room", "r"), ("Ballroom","r"), ("Hall","r"), ("Dining Room","r"), ("Study","r"), ("Lounge", "r"), ("Library", "r")]
+suspectCards = [("Mrs. White", "s"), ("Mr. Green", "s"), ("Miss Scarlet","s"), ("Professor Plum","s"), ("Colonel Mustard","s"), ("Ms. Peacock","s")]
+
+
+class Card (namedtuple('Card', ['name', 'catagory'])):
+    """A card of the game
+
+    Cards are immutable and each one is built only once, in CARDS, to be
+    shared by every deck and game.
+    """
+    __slots__ = ()
+
+    def __str__(self):
+        return self.name
+
+
+# Every card, numbered weapons first, then rooms, then suspects.
+CARDS = tuple(Card(name, catagory)
+              for name, catagory in weaponCards + roomCards + suspectCards)
+WEAPONS = CARDS[:len(weaponCards)]
+ROOMS = CARDS[len(WEAPONS):len(WEAPONS) + len(roomCards)]
+SUSPECTS = CARDS[len(WEAPONS) + len(ROOMS):]
+
+WEAPON_MASK = (1 << len(WEAPONS)) - 1
+ROOM_MASK = ((1 << len(ROOMS)) - 1) << len(WEAPONS)
+SUSPECT_MASK = ((1 << len(SUSPECTS)) - 1) << len(WEAPONS) + len(ROOMS)
+
+_bits = dict((card.name, 1 << number) for number, card in enumerate(CARDS))
+
+
+def card_mask(cards):
+    """Return the bitmask of some cards, given as Cards or by name"""
+    mask = 0
+    for card in cards:
+        mask |= _bits[str(card)]
+    return mask
+
+
+def cards_in(mask):
+    """Return the set of Cards whose bits are set in a mask"""
+    return {card for number, card in enumerate(CARDS) if mask >> number & 1}
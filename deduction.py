@@ -0,0 +1,177 @@
+"""Deduction of who holds which card from the history of suggestions
+
+A Deduction tracks, for every player and for the solution, the cards known
+to be held and the cards known not to be held, each as a card bitmask (see
+cards.py). Every event of the game is turned into facts about those masks,
+and the rules of the game are then applied until nothing more follows:
+
+* every card has exactly one holder, a player or the solution,
+* each player holds a fixed number of cards,
+* the solution holds exactly one card of each category, and
+* a player who refuted a suggestion holds at least one of its cards.
+
+Because the masks are ints, applying a rule to every card at once is a
+single bitwise operation, so an update costs microseconds.
+"""
+from cards import (CARDS, ROOM_MASK, SUSPECT_MASK, WEAPON_MASK, card_mask,
+                   cards_in)
+
+ALL_CARDS = (1 << len(CARDS)) - 1
+CATEGORY_MASKS = (WEAPON_MASK, ROOM_MASK, SUSPECT_MASK)
+
+
+class ContradictionError(Exception):
+    """Raised when the facts given cannot all be true"""
+
+
+def _count(mask):
+    return bin(mask).count('1')
+
+
+class Deduction(object):
+    """What can be deduced about every hand and the solution
+
+    Players are numbered by their place at the table, 0 to
+    len(hand_sizes) - 1, and the solution is treated as one more holder
+    numbered len(hand_sizes). Cards may be given as Cards or by name.
+    """
+
+    def __init__(self, hand_sizes):
+        self.hand_sizes = list(hand_sizes) + [len(CATEGORY_MASKS)]
+        self.solution = len(hand_sizes)
+        self.has = [0] * len(self.hand_sizes)
+        self.lacks = [0] * len(self.hand_sizes)
+        self.clauses = []
+
+    @classmethod
+    def for_player(cls, game, player):
+        """Start the deduction of one player of a Sleuth game
+
+        Only the hand of the given player is taken as known; the sizes of
+        the other hands follow from the way Deck deals.
+        """
+        from sleuth import Deck
+        deduction = cls(Deck.hand_sizes(len(game.players)))
+        deduction.holds(game.players.index(player), player.hand)
+        return deduction
+
+    def holds(self, holder, cards):
+        """Record that a holder holds every one of the given cards"""
+        self.has[holder] |= card_mask(cards)
+        self._propagate()
+
+    def does_not_hold(self, holder, cards):
+        """Record that a holder holds none of the given cards"""
+        self.lacks[holder] |= card_mask(cards)
+        self._propagate()
+
+    def holds_one_of(self, holder, cards):
+        """Record that a holder holds at least one of the given cards"""
+        self.clauses.append((holder, card_mask(cards)))
+        self._propagate()
+
+    def suggestion(self, suggester, cards, refuter=None, shown=None):
+        """Record the outcome of a suggestion
+
+        The players after the suggester, up to the refuter, could not
+        refute it and so hold none of its cards. The refuter holds the
+        shown card if it was seen, and otherwise at least one of the cards.
+        A refuter of None means nobody could refute the suggestion.
+        """
+        mask = card_mask(cards)
+        players = len(self.hand_sizes) - 1
+        holder = (suggester + 1) % players
+        while holder != suggester and holder != refuter:
+            self.lacks[holder] |= mask
+            holder = (holder + 1) % players
+
+        if refuter is not None:
+            if shown is not None:
+                self.has[refuter] |= card_mask([shown])
+            else:
+                self.clauses.append((refuter, mask))
+        self._propagate()
+
+    def known(self, holder):
+        """Return the set of Cards a holder is known to hold"""
+        return cards_in(self.has[holder])
+
+    def possible(self, holder):
+        """Return the set of Cards a holder might hold"""
+        return cards_in(ALL_CARDS & ~self.lacks[holder])
+
+    def solved(self):
+        """Return the set of solution Cards if it is known, else None"""
+        if _count(self.has[self.solution]) == len(CATEGORY_MASKS):
+            return cards_in(self.has[self.solution])
+        return None
+
+    def _propagate(self):
+        """Apply the rules of the game until nothing more follows"""
+        has, lacks = self.has, self.lacks
+        holders = range(len(has))
+        while True:
+            before = (tuple(has), tuple(lacks), len(self.clauses))
+
+            for holder in holders:
+                held_elsewhere = 0
+                lacked_elsewhere = ALL_CARDS
+                for other in holders:
+                    if other != holder:
+                        held_elsewhere |= has[other]
+                        lacked_elsewhere &= lacks[other]
+                lacks[holder] |= held_elsewhere
+                has[holder] |= lacked_elsewhere
+
+                size = self.hand_sizes[holder]
+                if _count(has[holder]) == size:
+                    lacks[holder] |= ALL_CARDS & ~has[holder]
+                if _count(ALL_CARDS & ~lacks[holder]) == size:
+                    has[holder] |= ALL_CARDS & ~lacks[holder]
+
+            for category in CATEGORY_MASKS:
+                if has[self.solution] & category:
+                    lacks[self.solution] |= category & ~has[self.solution]
+                possible = category & ~lacks[self.solution]
+                if _count(possible) == 1:
+                    has[self.solution] |= possible
+
+            clauses = []
+            for holder, mask in self.clauses:
+                possible = mask & ~lacks[holder]
+                if possible & has[holder]:
+                    continue
+                if _count(possible) == 1:
+                    has[holder] |= possible
+                    continue
+                clauses.append((holder, possible))
+            self.clauses = clauses
+
+            for holder in holders:
+                if has[holder] & lacks[holder]:
+                    raise ContradictionError(
+                        "Holder {} both holds and lacks {}".format(
+                            holder, sorted(map(str, cards_in(
+                                has[holder] & lacks[holder])))))
+                size = self.hand_sizes[holder]
+                if _count(has[holder]) > size:
+                    raise ContradictionError(
+                        "Holder {} holds more than {} cards".format(
+                            holder, size))
+                if _count(ALL_CARDS & ~lacks[holder]) < size:
+                    raise ContradictionError(
+                        "Holder {} may hold fewer than {} cards".format(
+                            holder, size))
+            for category in CATEGORY_MASKS:
+                if _count(has[self.solution] & category) > 1:
+                    raise ContradictionError(
+                        "The solution holds two cards of one category")
+                if not category & ~lacks[self.solution]:
+                    raise ContradictionError(
+                        "The solution holds no card of one category")
+            if any(not mask for _, mask in self.clauses):
+                raise ContradictionError(
+                    "A refuter holds none of the suggested cards")
+
+            if (tuple(has), tuple(lacks), len(self.clauses)) == before:
+                return
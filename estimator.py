@@ -0,0 +1,373 @@
+"""Estimates of how likely each card is to be in the solution
+
+Exact deduction (see deduction.py) often leaves several candidates in a
+category. SolutionEstimator weighs them by sampling whole deals which agree
+with everything a Deduction knows and counting how often each card ends up
+in the solution.
+
+A deal is drawn by picking one card of each category for the solution and
+then dealing every other card to one of the players not known to lack it,
+in proportion to the room left in their hands, with hand sizes as
+Deck.deal gives them. Cards whose holder is known have only one place to
+go. Deals which leave a refuter without any of the cards it refuted are
+rejected, and the rest are weighted by the inverse of the chance of
+drawing them, so that the weighted deals stand for every consistent deal
+equally.
+
+When too few deals get through, the estimator switches to a Markov chain
+that passes cards round small cycles of holders and keeps only moves which
+leave the deal consistent; its samples are also uniform over the
+consistent deals, though neighbouring samples are alike. The chain starts
+from a deal built to agree with every fact, the cards a refuter must hold
+one of being handed out first, so it never waits on lucky draws.
+
+Samples are drawn in batches and sampling stops early once every estimate
+is within the requested standard error, or once the time allowed for the
+estimate has run out.
+"""
+import random
+import time
+
+from cards import CARDS
+from deduction import ALL_CARDS, CATEGORY_MASKS
+
+
+def _count(mask):
+    return bin(mask).count('1')
+
+
+_numbers_cache = {}
+
+
+def _numbers_in(mask):
+    """Return the numbers of the cards in a mask, remembering the answer"""
+    numbers = _numbers_cache.get(mask)
+    if numbers is None:
+        numbers = _numbers_cache[mask] = [
+            number for number in range(len(CARDS)) if mask >> number & 1]
+    return numbers
+
+
+class EstimateTimeout(Exception):
+    """Raised when too few deals could be counted in the time allowed"""
+
+
+class SolutionEstimator(object):
+    """Samples the deals which agree with a Deduction
+
+    After estimate(), samples holds the number of deals counted, effective
+    the number of unweighted deals they are worth and method the way they
+    were drawn, 'weighted' or 'chain'. clock is the function time is read
+    from.
+    """
+
+    def __init__(self, deduction, rng=None, clock=time.perf_counter):
+        self.deduction = deduction
+        self.rng = random.Random() if rng is None else rng
+        self.clock = clock
+        self.samples = 0
+        self.effective = 0.0
+        self.method = None
+
+    def estimate(self, samples=1000, tolerance=0.03, batch=25,
+                 min_acceptance=0.05, time_limit=0.008, min_samples=10):
+        """Return the chance that each card is in the solution
+
+        Draws at most samples deals, in batches, stopping once the standard
+        error of every estimate is below tolerance or, unless time_limit is
+        None, once time_limit seconds have passed, so that a bot's turn
+        stays quick. Pass time_limit=None with a seeded rng for estimates
+        which do not depend on the speed of the machine.
+
+        If fewer than min_acceptance of the weighted deals drawn agree with
+        the facts, sampling starts again with the swapping chain. The time
+        limit holds for either way of sampling and for finding a deal for
+        the chain to start from. If it runs out before deals worth
+        min_samples unweighted ones have been counted, EstimateTimeout is
+        raised rather than returning estimates too rough to act on.
+        ValueError is raised if no deal at all agrees with the facts.
+
+        Returns a dict mapping every Card to its estimated probability.
+        """
+        clock = self.clock
+        deadline = None if time_limit is None else clock() + time_limit
+        order = self._order()
+        totals = [0.0] * len(CARDS)
+        weights = squares = 0.0
+        self.samples = drawn = 0
+        self.effective = 0.0
+        self.method = 'weighted'
+        state = None
+
+        while self.samples < samples:
+            size = min(batch, samples - self.samples)
+            if self.method == 'weighted':
+                draws = [self._draw(order) for _ in range(size)]
+                draws = [draw for draw in draws if draw is not None]
+                drawn += size
+                if draws:
+                    state = draws[-1][0]
+                if self.samples + len(draws) < min_acceptance * drawn:
+                    if state is None:
+                        state = self._start(deadline)
+                    self.method = 'chain'
+                    totals = [0.0] * len(CARDS)
+                    weights = squares = 0.0
+                    self.samples = 0
+                    continue
+            else:
+                draws = []
+                for _ in range(size):
+                    state = self._walk(state, len(state) * 2)
+                    draws.append((state, 1.0))
+                    if deadline is not None and clock() > deadline:
+                        break
+
+            for deal, weight in draws:
+                for number in _numbers_in(deal[self.deduction.solution]):
+                    totals[number] += weight
+                weights += weight
+                squares += weight * weight
+            self.samples += len(draws)
+            if squares:
+                self.effective = weights * weights / squares
+
+            if self.samples >= batch and self._settled(totals, weights,
+                                                       squares, tolerance):
+                break
+            if deadline is not None and clock() > deadline:
+                if self.effective < min_samples:
+                    raise EstimateTimeout(
+                        "Only {:.1f} deals counted in {}s".format(
+                            self.effective, time_limit))
+                break
+
+        weights = weights or 1.0
+        return dict((card, totals[number] / weights)
+                    for number, card in enumerate(CARDS))
+
+    @staticmethod
+    def _settled(totals, weights, squares, tolerance):
+        """Determine if every estimate is within the tolerance
+
+        Weighted deals count for less than as many plain ones; the
+        effective number of samples is used for the standard error.
+        """
+        effective = weights * weights / squares
+        return all((total / weights) * (1 - total / weights) / effective <
+                   tolerance ** 2 for total in totals)
+
+    def _order(self):
+        """Return the cards the solution may hold and where others may go
+
+        The first is a list of card bits for each category, the second a
+        list of (card bit, players) for every card whose holder is not yet
+        known. Cards with the fewest
+        players come first, which keeps a draw from running out of room
+        for them.
+        """
+        lacks = self.deduction.lacks
+        solution = self.deduction.solution
+        candidates = [[1 << number for number in _numbers_in(
+            category & ~lacks[solution])] for category in CATEGORY_MASKS]
+
+        held = 0
+        for mask in self.deduction.has[:solution]:
+            held |= mask
+        order = []
+        for number in _numbers_in(ALL_CARDS & ~held):
+            bit = 1 << number
+            players = [holder for holder in range(solution)
+                       if not lacks[holder] & bit]
+            order.append((len(players), number, players))
+        order.sort()
+        return candidates, [(1 << number, players)
+                            for _, number, players in order]
+
+    def _draw(self, order):
+        """Draw a deal which agrees with what every holder lacks
+
+        The solution is drawn first, then every other card is given to one
+        of the players who may hold it, in proportion to the room left in
+        their hands, as dealing a shuffled deck would.
+
+        Returns a list of card masks, one per player and the solution last,
+        with the weight of the deal, or None if the deal breaks any other
+        fact.
+        """
+        deduction = self.deduction
+        random = self.rng.random
+        candidates, cards = order
+        weight = 1.0
+        solution = 0
+        for bits in candidates:
+            if not bits:
+                return None
+            solution |= bits[int(random() * len(bits))]
+            weight *= len(bits)
+
+        deal = deduction.has[:-1] + [solution]
+        room = [size - _count(mask)
+                for size, mask in zip(deduction.hand_sizes, deal)]
+        for bit, players in cards:
+            if bit & solution:
+                continue
+            total = 0
+            for player in players:
+                total += room[player]
+            if not total:
+                return None
+            pick = random() * total
+            for player in players:
+                pick -= room[player]
+                if pick < 0:
+                    break
+            weight *= total / room[player]
+            deal[player] |= bit
+            room[player] -= 1
+
+        for holder, mask in deduction.clauses:
+            if not deal[holder] & mask:
+                return None
+        return deal, weight
+
+    def _start(self, deadline=None):
+        """Build a deal which agrees with every fact
+
+        Each clause is met first, those with the fewest cards to choose
+        from first, by giving its holder one of the cards it names, and the
+        other cards are then matched to the room left in the hands. A
+        clause choice after which the other cards cannot all be placed is
+        undone at once. Choices are made at random.
+
+        Returns a list of card masks as _draw does. Raises ValueError if no
+        deal agrees with the facts, and EstimateTimeout if none is found
+        before the clock passes the deadline.
+        """
+        deduction = self.deduction
+        rng = self.rng
+        lacks = deduction.lacks
+        deal = list(deduction.has)
+        clauses = sorted(deduction.clauses,
+                         key=lambda clause: _count(clause[1] & ~lacks[clause[0]]))
+        clock = self.clock
+
+        def meet(i):
+            if deadline is not None and clock() > deadline:
+                raise EstimateTimeout("No deal to start the chain from found "
+                                      "in time")
+            while i < len(clauses) and deal[clauses[i][0]] & clauses[i][1]:
+                i += 1
+            rest = self._place(deal)
+            if rest is None or i == len(clauses):
+                return rest
+            holder, mask = clauses[i]
+            dealt = 0
+            for hand in deal:
+                dealt |= hand
+            bits = [1 << number for number in
+                    _numbers_in(mask & ~dealt & ~lacks[holder])]
+            rng.shuffle(bits)
+            for bit in bits:
+                deal[holder] |= bit
+                found = meet(i + 1)
+                if found is not None:
+                    return found
+                deal[holder] &= ~bit
+            return None
+
+        found = meet(0)
+        if found is None:
+            raise ValueError("No deal agrees with the facts")
+        return found
+
+    def _place(self, deal):
+        """Deal the cards no hand holds yet into the room left, if they fit
+
+        The room left in each hand is split into single places, those of
+        the solution one per category it still needs, and cards are
+        matched to places by augmenting paths. Returns the completed deal,
+        or None if the cards cannot all be placed.
+        """
+        deduction = self.deduction
+        lacks = deduction.lacks
+        solution = deduction.solution
+        dealt = 0
+        places = []
+        for holder, (size, mask) in enumerate(zip(deduction.hand_sizes, deal)):
+            dealt |= mask
+            if holder == solution:
+                places.extend((holder, category) for category in CATEGORY_MASKS
+                              if not mask & category)
+            else:
+                places.extend([(holder, ALL_CARDS)] * (size - _count(mask)))
+            if _count(mask) > size:
+                return None
+        self.rng.shuffle(places)
+
+        cards = [1 << number for number in _numbers_in(ALL_CARDS & ~dealt)]
+        if len(cards) != len(places):
+            return None
+        taken = [None] * len(places)
+
+        def fits(bit, place):
+            holder, allowed = places[place]
+            return bit & allowed and not bit & lacks[holder]
+
+        def assign(bit, visited):
+            for place in range(len(places)):
+                if place in visited or not fits(bit, place):
+                    continue
+                visited.add(place)
+                if taken[place] is None or assign(taken[place], visited):
+                    taken[place] = bit
+                    return True
+            return False
+
+        if not all(assign(bit, set()) for bit in cards):
+            return None
+        deal = list(deal)
+        for (holder, _), bit in zip(places, taken):
+            deal[holder] |= bit
+        return deal
+
+    def _walk(self, deal, steps):
+        """Take a number of steps of the swapping chain from a deal
+
+        Each step proposes to pass one card round a cycle of two or three
+        holders and makes the move only if the solution still has one card
+        of each category and the deal still agrees with every fact. Cycles
+        of three reach deals which single swaps cannot when the facts tie
+        cards together.
+        """
+        rng = self.rng
+        deduction = self.deduction
+        lacks = deduction.lacks
+        solution = deduction.solution
+        clauses = [[] for _ in deal]
+        for holder, mask in deduction.clauses:
+            clauses[holder].append(mask)
+
+        deal = list(deal)
+        holders = range(len(deal))
+        for _ in range(steps):
+            cycle = rng.sample(holders, rng.choice((2, 3)))
+            moved = [1 << rng.choice(_numbers_in(deal[holder]))
+                     for holder in cycle if deal[holder]]
+            if len(moved) < len(cycle):
+                continue
+
+            masks = [deal[holder] ^ (moved[i] | moved[i - 1])
+                     for i, holder in enumerate(cycle)]
+            for holder, mask in zip(cycle, masks):
+                if mask & lacks[holder] or not all(
+                        mask & clause for clause in clauses[holder]):
+                    break
+                if holder == solution and not all(
+                        _count(mask & category) == 1
+                        for category in CATEGORY_MASKS):
+                    break
+            else:
+                for holder, mask in zip(cycle, masks):
+                    deal[holder] = mask
+        return deal
@@ -0,0 +1,260 @@
+"""An append-only log of the events of Sleuth games, and their replay
+
+Every record of the log is a small header, the length of its payload, its
+kind and the game it belongs to, followed by the payload, so one log may
+hold the events of a single game or of every game on a server:
+
+    deal      snapshot of the game as dealt (see snapshot.py)
+    roll      player, roll
+    move      player, x, y
+    suggest   player, suggestion mask
+    refute    refuter, card shown (255 when nobody refuted or unseen)
+    accuse    player, accusation mask, correct
+    snapshot  events so far, snapshot of the game
+
+A GameRecorder plays the actions of a game and records them together, and
+writes a snapshot every so many events. EventReader maps a log into memory
+and streams its records as memoryview slices of the file, so even a very
+large log is never read in full. replay() rebuilds a game as it was after
+any number of its events, starting from the latest snapshot before that
+point instead of from the deal.
+"""
+import mmap
+import struct
+from collections import namedtuple
+
+import snapshot
+from board import Location
+from cards import CARDS, card_mask, cards_in
+
+DEAL, ROLL, MOVE, SUGGEST, REFUTE, ACCUSE, SNAPSHOT = range(7)
+
+_record = struct.Struct('<HBI')
+_roll = struct.Struct('<BB')
+_move = struct.Struct('<BBB')
+_suggest = struct.Struct('<BI')
+_refute = struct.Struct('<BB')
+_accuse = struct.Struct('<BIB')
+_snapshot = struct.Struct('<I')
+_NOBODY = 255
+
+_numbers = dict((card.name, number) for number, card in enumerate(CARDS))
+
+Record = namedtuple('Record', ['offset', 'kind', 'game', 'payload'])
+
+
+class EventLogError(Exception):
+    """Raised for a log which cannot be read or replayed"""
+
+
+class EventLog(object):
+    """Appends records to a log file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'ab')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def append(self, game, kind, payload=b''):
+        """Append a record and return its offset in the file"""
+        offset = self._file.tell()
+        self._file.write(_record.pack(len(payload), kind, game) + payload)
+        return offset
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class GameRecorder(object):
+    """Plays the actions of one game and records each of them in a log
+
+    A snapshot of the game is logged after every snapshot_every events.
+    """
+
+    def __init__(self, log, game_id, game, snapshot_every=64):
+        self.log = log
+        self.game_id = game_id
+        self.game = game
+        self.snapshot_every = snapshot_every
+        self.events = 0
+        self._since_snapshot = 0
+        self._record(DEAL, snapshot.dumps(game))
+
+    def roll(self, player, roll):
+        self.game.turn = player
+        self._record(ROLL, _roll.pack(player, roll))
+
+    def move(self, player, location):
+        self.game.turn = player
+        self.game.players[player].position = location
+        self._record(MOVE, _move.pack(player, location[0], location[1]))
+
+    def suggest(self, player, suggestion, shown=None):
+        """Make a suggestion and record it and its refutation
+
+        shown is the card the refuter chose to show, if it is known.
+        Returns the refuter and the cards it could show, as Sleuth.refute
+        does.
+        """
+        game = self.game
+        game.turn = player
+        refuter, cards = game.refute(game.players[player], suggestion)
+        self._record(SUGGEST, _suggest.pack(player, card_mask(suggestion)))
+        self._record(REFUTE, _refute.pack(
+            _NOBODY if refuter is None else game.players.index(refuter),
+            _NOBODY if shown is None else _numbers[str(shown)]))
+        return refuter, cards
+
+    def accuse(self, player, accusation):
+        """Make an accusation, record it and return whether it was right"""
+        self.game.turn = player
+        correct = self.game.accuse(accusation)
+        self._record(ACCUSE, _accuse.pack(player, card_mask(accusation),
+                                          correct))
+        return correct
+
+    def _record(self, kind, payload):
+        self.log.append(self.game_id, kind, payload)
+        self.events += 1
+        self._since_snapshot += 1
+        if self._since_snapshot >= self.snapshot_every:
+            self.log.append(self.game_id, SNAPSHOT,
+                            _snapshot.pack(self.events) +
+                            snapshot.dumps(self.game))
+            self._since_snapshot = 0
+
+
+class EventReader(object):
+    """Reads a log through a memory map"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as log:
+            self._map = (mmap.mmap(log.fileno(), 0, access=mmap.ACCESS_READ)
+                         if log.seek(0, 2) else None)
+        self._data = memoryview(self._map if self._map is not None else b'')
+        self._snapshots = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Let go of the mapped file
+
+        Payloads still held keep the mapping alive: it is closed once the
+        last of them is dropped.
+        """
+        data, mapping = self._data, self._map
+        self._data, self._map = memoryview(b''), None
+        try:
+            data.release()
+            if mapping is not None:
+                mapping.close()
+        except BufferError:
+            # Slices of the map are still in use; it closes itself when
+            # they are garbage collected.
+            pass
+
+    def records(self, game=None, offset=0):
+        """Yield the Records from an offset on, of one game or of every game
+
+        Payloads are memoryview slices of the mapped file. They stay
+        readable after the reader is closed, holding the file mapped until
+        they are dropped; release them, or copy them with bytes(), to free
+        the mapping sooner.
+        """
+        data = self._data
+        end = len(data)
+        while offset < end:
+            if offset + _record.size > end:
+                raise EventLogError("Truncated record at {}".format(offset))
+            length, kind, game_id = _record.unpack_from(data, offset)
+            start = offset + _record.size
+            if start + length > end:
+                raise EventLogError("Truncated record at {}".format(offset))
+            if game is None or game == game_id:
+                yield Record(offset, kind, game_id, data[start:start + length])
+            offset = start + length
+
+    def games(self):
+        """Return the ids of the games in the log, in the order dealt"""
+        return [record.game for record in self.records() if record.kind == DEAL]
+
+    def replay(self, game, events=None):
+        """Rebuild a game as it was after a number of its events
+
+        The deal is the first event, so events=1 gives the game as dealt.
+        With events None, every event of the game is replayed.
+        """
+        if self._snapshots is None:
+            self._index()
+        if game not in self._snapshots:
+            raise EventLogError("No game {} in the log".format(game))
+
+        count, offset = 0, self._snapshots[game][0][1]
+        for snapshot_count, snapshot_offset in self._snapshots[game]:
+            if events is None or snapshot_count <= events:
+                count, offset = snapshot_count, snapshot_offset
+
+        state = None
+        for record in self.records(game, offset):
+            if record.kind == SNAPSHOT:
+                if state is None:
+                    state = snapshot.loads(record.payload, _snapshot.size)
+                continue
+            if events is not None and count >= events:
+                break
+            state = apply(state, record)
+            count += 1
+        return state
+
+    def _index(self):
+        """Find the deal and the snapshots of every game"""
+        self._snapshots = {}
+        for record in self.records():
+            if record.kind == DEAL:
+                self._snapshots[record.game] = [(0, record.offset)]
+            elif record.kind == SNAPSHOT:
+                count, = _snapshot.unpack_from(record.payload)
+                self._snapshots[record.game].append((count, record.offset))
+
+
+def apply(game, record):
+    """Return a game with the event of a record played on it
+
+    A deal starts a new game; other events change the game given.
+    """
+    kind, payload = record.kind, record.payload
+    if kind == DEAL:
+        return snapshot.loads(payload)
+    if game is None:
+        raise EventLogError("Event at {} comes before the deal".format(
+            record.offset))
+
+    if kind == ROLL:
+        game.turn = _roll.unpack_from(payload)[0]
+    elif kind == MOVE:
+        player, x, y = _move.unpack_from(payload)
+        game.turn = player
+        game.players[player].position = Location(x, y)
+    elif kind == SUGGEST:
+        player, mask = _suggest.unpack_from(payload)
+        game.turn = player
+        game.refute(game.players[player], cards_in(mask))
+    elif kind == ACCUSE:
+        game.turn = _accuse.unpack_from(payload)[0]
+    elif kind not in (REFUTE, SNAPSHOT):
+        raise EventLogError("Unknown event kind {} at {}".format(
+            kind, record.offset))
+    return game
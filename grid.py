@@ -41,3 +41,22 @@ grid = [
 [0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0]
 
 ]
+
+# The room each door leads into, given as the (x, y) of its door tiles
+rooms = {"Kitchen": [(4, 6)],
+         "Ballroom": [(8, 5), (15, 5), (9, 7), (14, 7)],
+         "Conservatory": [(18, 4)],
+         "Billards Room": [(18, 9), (22, 12)],
+         "Library": [(20, 14), (17, 16)],
+         "Study": [(17, 21)],
+         "Hall": [(11, 18), (12, 18), (14, 20)],
+         "Lounge": [(6, 19)],
+         "Dining Room": [(7, 12), (6, 15)]}
+
+# The (x, y) each suspect starts the game on
+starts = {"Mrs. White": (9, 0),
+          "Mr. Green": (14, 0),
+          "Miss Scarlet": (7, 24),
+          "Professor Plum": (23, 19),
+          "Colonel Mustard": (0, 17),
+          "Ms. Peacock": (23, 6)}
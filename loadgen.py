@@ -0,0 +1,173 @@
+"""A load generator for the Sleuth game server
+
+Opens a number of connections to a server (see server.py) and plays many
+games over each at once. Every player takes random turns: roll, move to a
+random destination and, on entering a door, suggest random cards. The time
+from sending a roll to the reply to the move which ends it is recorded as
+the latency of the turn, and the 50th and 99th percentiles are reported.
+
+Run against a server already listening, or with --serve to start one in
+the same process:
+
+    python loadgen.py --serve --connections 20 --games 50 --turns 30
+
+With --seeded every game is seeded from --seed, so a run plays the same
+games each time; the server must allow seeds (server.py --allow-seed).
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+
+from cards import ROOMS, SUSPECTS, WEAPONS
+from simulation import DEFAULT_SUSPECTS
+
+
+class GameClient(object):
+    """A connection to the server which may have many requests in flight"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self._ids = itertools.count(1)
+        self._waiting = {}
+        self._replies = asyncio.ensure_future(self._read())
+
+    @classmethod
+    async def connect(cls, host, port):
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def request(self, op, **fields):
+        """Send a request and return its reply"""
+        fields['op'] = op
+        fields['id'] = request_id = next(self._ids)
+        reply = self._waiting[request_id] = (
+            asyncio.get_running_loop().create_future())
+        self.writer.write(json.dumps(fields).encode() + b'\n')
+        await self.writer.drain()
+        return await reply
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        self._replies.cancel()
+
+    async def _read(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            reply = json.loads(line)
+            self._waiting.pop(reply['id']).set_result(reply)
+        for reply in self._waiting.values():
+            reply.set_exception(ConnectionError("The server hung up"))
+
+
+def percentile(values, percent):
+    """Return the value below which a percentage of the values lie"""
+    values = sorted(values)
+    if not values:
+        return None
+    index = int(round(percent / 100.0 * (len(values) - 1)))
+    return values[index]
+
+
+async def play(client, rng, players, turns, latencies, seeded=False):
+    """Play one game with random turns, adding each turn's latency
+
+    If seeded, the game itself is seeded from rng too.
+    """
+    fields = {'seed': rng.random()} if seeded else {}
+    game = (await client.request('new', suspects=list(players),
+                                 **fields))['game']
+    for _ in range(turns):
+        state = await client.request('state', game=game)
+        if state['phase'] == 'over':
+            break
+        player = state['player']
+
+        started = time.perf_counter()
+        rolled = await client.request('roll', game=game, player=player)
+        if rolled['ok'] and rolled['destinations']:
+            moved = await client.request(
+                'move', game=game, player=player,
+                to=rng.choice(rolled['destinations']))
+            if moved['ok'] and moved['door']:
+                await client.request(
+                    'suggest', game=game, player=player,
+                    cards=[rng.choice(cards).name
+                           for cards in (SUSPECTS, WEAPONS, ROOMS)])
+        latencies.append(time.perf_counter() - started)
+    await client.request('close', game=game)
+
+
+async def generate(host, port, connections=10, games=10, turns=30,
+                   players=DEFAULT_SUSPECTS, seed=0, seeded=False):
+    """Play games on every connection at once and return the turn latencies
+
+    Each connection plays its games side by side. The players' choices
+    follow from seed, and with seeded the games' deals and rolls do too.
+    """
+    rng = random.Random(seed)
+    latencies = []
+    clients = [await GameClient.connect(host, port)
+               for _ in range(connections)]
+    try:
+        await asyncio.gather(*[
+            play(client, random.Random(rng.random()), players, turns,
+                 latencies, seeded)
+            for client in clients for _ in range(games)])
+    finally:
+        for client in clients:
+            await client.close()
+    return latencies
+
+
+def report(latencies, elapsed):
+    return ("{} turns in {:.2f}s ({:.0f} turns/s), "
+            "p50 {:.2f} ms, p99 {:.2f} ms".format(
+                len(latencies), elapsed, len(latencies) / elapsed,
+                percentile(latencies, 50) * 1000,
+                percentile(latencies, 99) * 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--serve', action='store_true',
+                        help="start a server in this process")
+    parser.add_argument('--connections', type=int, default=10)
+    parser.add_argument('--games', type=int, default=10,
+                        help="games played at once on each connection")
+    parser.add_argument('--turns', type=int, default=30)
+    parser.add_argument('--players', type=int, default=len(DEFAULT_SUSPECTS))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--seeded', action='store_true',
+                        help="seed the games as well as the players")
+    args = parser.parse_args()
+
+    async def run():
+        server = port = None
+        if args.serve:
+            from server import GameServer
+            server = GameServer(allow_seed=args.seeded)
+            port = await server.start(args.host, 0)
+        started = time.perf_counter()
+        latencies = await generate(
+            args.host, port or args.port, args.connections, args.games,
+            args.turns, DEFAULT_SUSPECTS[:args.players], args.seed,
+            args.seeded)
+        elapsed = time.perf_counter() - started
+        if server is not None:
+            await server.close()
+        print(report(latencies, elapsed))
+
+    asyncio.run(run())
+
+
+if __name__ == '__main__':
+    main()
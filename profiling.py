@@ -0,0 +1,201 @@
+"""Opt-in instrumentation of the Board's class methods
+
+A BoardProfiler swaps the class methods of a board for wrappers which
+count calls, note how deeply instrumented calls are nested in one another,
+count the partial moves expanded by each query and keep histograms of the
+time each call takes. Disabling it puts the original methods back, so a
+board which is not being profiled runs exactly the code it always did:
+
+    with BoardProfiler() as profiler:
+        serve_some_requests()
+    profiler.dump('board-stats.json')
+
+stats() returns, for every method called at least once:
+
+    {"available_destinations": {
+        "calls": 120, "max_depth": 0,
+        "seconds": {"count": 120, "total": 0.031, "min": ..., "max": ...,
+                    "buckets": {"16": 3, "32": 90, ...}},
+        "nodes": {...}}, ...}
+
+Histogram buckets are powers of two, keyed by their upper bound; times are
+bucketed in microseconds. A depth of 0 is a call from outside the board;
+available_destinations calls _destinations at depth 1, for example. The
+nodes of a call are the partial moves expanded while it ran, including
+those of the calls nested in it; a query answered from the cache expands
+none.
+"""
+import json
+import threading
+import time
+
+from board import Board
+
+DEFAULT_METHODS = ('tile_at', 'is_accessable', 'in_board', 'door_accessable',
+                   'is_door', 'room_of', 'rooms_within', 'distance',
+                   'within_reach', 'doors_within', 'path_to', 'reach_chances',
+                   'available_destinations',
+                   'batch_destinations', '_destinations', '_expand')
+
+
+class Histogram(object):
+    """Counts of values in buckets whose upper bounds are powers of two
+
+    Bucket bounds are counted in units of unit, so a histogram of seconds
+    with a unit of 1e-6 has buckets of 1, 2, 4... microseconds.
+    """
+
+    def __init__(self, unit=1):
+        self.unit = unit
+        self.count = 0
+        self.total = 0
+        self.min = self.max = None
+        self.buckets = {}
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        bound = 1
+        while bound * self.unit < value:
+            bound <<= 1
+        self.buckets[bound] = self.buckets.get(bound, 0) + 1
+
+    def to_dict(self):
+        return {'count': self.count,
+                'total': self.total,
+                'min': self.min,
+                'max': self.max,
+                'buckets': dict((str(bound), count) for bound, count
+                                in sorted(self.buckets.items()))}
+
+
+class MethodStats(object):
+    """What a BoardProfiler has seen of one method"""
+
+    def __init__(self):
+        self.calls = 0
+        self.max_depth = 0
+        self.seconds = Histogram(unit=1e-6)
+        self.nodes = Histogram()
+
+    def add(self, depth, seconds, nodes):
+        self.calls += 1
+        self.max_depth = max(self.max_depth, depth)
+        self.seconds.add(seconds)
+        self.nodes.add(nodes)
+
+    def to_dict(self):
+        return {'calls': self.calls,
+                'max_depth': self.max_depth,
+                'seconds': self.seconds.to_dict(),
+                'nodes': self.nodes.to_dict()}
+
+
+class BoardProfiler(object):
+    """Instruments the class methods of a board while enabled
+
+    methods names the methods to wrap. A board class loaded by boards.py
+    may be profiled on its own; methods it inherits from Board are shadowed
+    on it while enabled and the board it inherits them from is untouched.
+    Calls from many threads may be profiled at once.
+    """
+
+    def __init__(self, board=Board, methods=DEFAULT_METHODS):
+        self.board = board
+        self.methods = tuple(methods)
+        self.enabled = False
+        self._originals = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.disable()
+
+    def enable(self):
+        """Start instrumenting the board's methods"""
+        if self.enabled:
+            return
+        board = self.board
+        for name in self.methods:
+            original = None
+            for klass in board.__mro__:
+                if name in klass.__dict__:
+                    original = klass.__dict__[name]
+                    break
+            if original is None:
+                raise AttributeError("{} has no method {}".format(
+                    board.__name__, name))
+            self._originals[name] = (name in board.__dict__, original)
+            # type.__setattr__ skips the layout bookkeeping of the metaclass,
+            # which only cares about the grid and its tables.
+            type.__setattr__(board, name, self._wrap(name, original))
+        self.enabled = True
+
+    def disable(self):
+        """Put the original methods back"""
+        if not self.enabled:
+            return
+        for name, (own, original) in self._originals.items():
+            if own:
+                type.__setattr__(self.board, name, original)
+            else:
+                type.__delattr__(self.board, name)
+        self._originals.clear()
+        self.enabled = False
+
+    def reset(self):
+        """Forget everything seen so far"""
+        with self._lock:
+            self._stats.clear()
+
+    def stats(self):
+        """Return the statistics of every method called, as a dict"""
+        with self._lock:
+            return dict((name, stats.to_dict())
+                        for name, stats in sorted(self._stats.items()))
+
+    def dump(self, path):
+        """Write the statistics to a file as JSON"""
+        with open(path, 'w') as out:
+            json.dump(self.stats(), out, indent=1, sort_keys=True)
+            out.write('\n')
+
+    def _wrap(self, name, original):
+        function = original.__func__
+        local = self._local
+
+        def instrumented(*args, **kwargs):
+            depth = getattr(local, 'depth', 0)
+            before = getattr(local, 'nodes', 0)
+            # _expand(layout, frontier, remaining, blocked) expands every
+            # partial move of its frontier.
+            local.nodes = before + len(args[1]) if name == '_expand' else before
+            local.depth = depth + 1
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                local.depth = depth
+                self._record(name, depth, elapsed, local.nodes - before)
+
+        instrumented.__name__ = function.__name__
+        instrumented.__doc__ = function.__doc__
+        instrumented.__wrapped__ = function
+        return type(original)(instrumented)
+
+    def _record(self, name, depth, seconds, nodes):
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = MethodStats()
+            stats.add(depth, seconds, nodes)
@@ -0,0 +1,90 @@
+"""Destinations for every player in a game, kept up to date as they move
+
+Between turns only one player moves, yet each player's destinations depend
+on where everybody else stands. Rather than searching again from scratch
+for every player after each move, IncrementalReachability keeps the layers
+of each player's search and redoes only the layers a move can have changed.
+"""
+from board import Board, MAX_ROLL
+
+
+class IncrementalReachability(object):
+    """The destinations of every player in one game, for every roll
+
+    positions maps each player (any hashable key, such as the character
+    name) to the Location they stand on. Every player blocks the tiles of
+    the others, as with the exclude set of Board.available_destinations.
+
+    A player's search keeps the frontier of partial moves after each step.
+    A tile which is d steps from a player cannot be walked over before step
+    d, so when that tile is vacated or occupied only the layers from step d
+    onwards are searched again, starting from the frontier kept for step
+    d - 1. Players further than max_roll from both tiles keep their search.
+    """
+
+    def __init__(self, positions, max_roll=MAX_ROLL, board=Board):
+        self.board = board
+        self.max_roll = max_roll
+        self.positions = dict(positions)
+        self.layers_expanded = 0
+        self._frontiers = {}
+        self._entered = {}
+        for player in self.positions:
+            self._search(player, 1)
+
+    def destinations(self, player, roll):
+        """Return the set of places a player may move to with a roll"""
+        if roll == 0:
+            return {self.positions[player]}
+        if not 0 < roll <= self.max_roll:
+            raise ValueError("Roll must be between 0 and {}".format(
+                self.max_roll))
+
+        layout = self.board.layout()
+        numbers = set().union(*self._entered[player][1:roll + 1])
+        numbers.update(number for number, _ in self._frontiers[player][roll])
+        return {layout.location(number) for number in numbers}
+
+    def move(self, player, location):
+        """Move a player and bring every player's destinations up to date"""
+        layout = self.board.layout()
+        changed = (self.board._number(layout, self.positions[player]),
+                   self.board._number(layout, location))
+        self.positions[player] = location
+
+        for other, position in self.positions.items():
+            if other == player:
+                self._search(other, 1)
+                continue
+
+            start = self.board._number(layout, position)
+            distances = [layout.distances.distance(start, tile)
+                         for tile in changed]
+            distances = [distance for distance in distances
+                         if distance is not None]
+            if distances and min(distances) <= self.max_roll:
+                self._search(other, max(min(distances), 1))
+
+    def _search(self, player, first_step):
+        """Search again from the given step onwards for a player"""
+        layout = self.board.layout()
+        blocked = self.board._blocked(
+            layout, [position for other, position in self.positions.items()
+                     if other != player])
+
+        if first_step == 1:
+            start = self.board._number(layout, self.positions[player])
+            self._frontiers[player] = [{(start, 0)}]
+            self._entered[player] = [set()]
+        frontiers = self._frontiers[player][:first_step]
+        entered = self._entered[player][:first_step]
+
+        for step in range(first_step, self.max_roll + 1):
+            doors, frontier = self.board._expand(
+                layout, frontiers[-1], self.max_roll - step, blocked)
+            frontiers.append(frontier)
+            entered.append(doors)
+            self.layers_expanded += 1
+
+        self._frontiers[player] = frontiers
+        self._entered[player] = entered
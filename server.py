@@ -0,0 +1,346 @@
+"""A server hosting many Sleuth games in one asyncio event loop
+
+Clients speak newline delimited JSON over TCP. Every request is an object
+with an "op", the fields that op needs and an optional "id" which is echoed
+in the reply, so a client may send many requests without waiting:
+
+    new      suspects[, seed]     -> game, players
+    state    game                 -> player, phase, positions, winner
+    roll     game, player         -> roll, destinations
+    move     game, player, to     -> position, door
+    suggest  game, player, cards  -> refuter, card
+    accuse   game, player, cards  -> correct, winner
+    close    game
+
+A seed fixes the deal and every roll of a game, so anyone who knows it
+can work out the solution; it is only accepted by a server started with
+allow_seed, for tests and load tests. Otherwise games draw from the
+operating system's randomness.
+
+Players are given by their place at the table and locations as [x, y].
+Replies carry "ok": true, or "ok": false and an "error". A game belongs
+to the connection which started it and is closed when that connection
+is, so games abandoned by their clients do not fill the server.
+
+A turn is a roll followed by a move to one of the destinations rolled. A
+player who moves into a door then suggests before the turn passes, and a
+player may accuse instead of rolling or suggesting.
+
+Board.available_destinations runs in an executor, so working out a long
+move never holds up the other games. Requests for one game are handled in
+turn under that game's lock, while requests for different games run side
+by side. Each connection has a limit on the requests in progress and the
+server stops reading from a connection which reaches it, so a client that
+sends faster than it is served is slowed down by TCP itself.
+
+Run from the command line to serve on a port:
+
+    python server.py --port 8765 --processes 4
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from board import Board, Location
+from cards import SUSPECTS
+from sleuth import Sleuth
+
+_SUSPECT_NAMES = frozenset(card.name for card in SUSPECTS)
+
+
+class ProtocolError(Exception):
+    """Raised for a request which cannot be carried out"""
+
+
+class GameSession(object):
+    """One hosted game and whose turn it is
+
+    phase is 'roll', 'move' or 'suggest' while the game goes on and
+    'over' once it has ended.
+    """
+
+    def __init__(self, suspects, seed=None):
+        self.rng = random.SystemRandom() if seed is None else random.Random(
+            seed)
+        self.game = Sleuth(suspects, self.rng)
+        self.lock = asyncio.Lock()
+        self.phase = 'roll'
+        self.destinations = frozenset()
+        self.eliminated = set()
+        self.winner = None
+
+    @property
+    def turn(self):
+        return self.game.turn
+
+    @turn.setter
+    def turn(self, turn):
+        self.game.turn = turn
+
+    def check_turn(self, player, *phases):
+        """Raise ProtocolError unless it is the player's turn to do this"""
+        if self.phase == 'over':
+            raise ProtocolError("The game is over")
+        if player != self.turn:
+            raise ProtocolError("It is not player {}'s turn".format(player))
+        if self.phase not in phases:
+            raise ProtocolError("Cannot do that in the {} phase".format(
+                self.phase))
+
+    def others(self):
+        """Return the set of positions of every player but the current one"""
+        return {player.position for i, player in enumerate(self.game.players)
+                if i != self.turn}
+
+    def next_turn(self):
+        """Pass the turn to the next player still in the game"""
+        self.phase = 'roll'
+        self.destinations = frozenset()
+        players = len(self.game.players)
+        if len(self.eliminated) == players:
+            self.phase = 'over'
+            return
+        self.turn = (self.turn + 1) % players
+        while self.turn in self.eliminated:
+            self.turn = (self.turn + 1) % players
+
+    def state(self):
+        return {'player': self.turn,
+                'phase': self.phase,
+                'positions': [list(player.position)
+                              for player in self.game.players],
+                'winner': self.winner}
+
+
+class GameServer(object):
+    """Hosts Sleuth games for any number of connections
+
+    executor runs Board.available_destinations; by default it is a few
+    threads, which share the Board safely, and a ProcessPoolExecutor
+    spreads the work over several cores. max_pending
+    limits the requests in progress on one connection and max_jobs the
+    calls waiting on the executor. Clients may only seed their games if
+    allow_seed is true.
+    """
+
+    def __init__(self, executor=None, max_games=10000, max_pending=32,
+                 max_jobs=256, allow_seed=False):
+        self.executor = (ThreadPoolExecutor(4) if executor is None
+                         else executor)
+        self.max_games = max_games
+        self.max_pending = max_pending
+        self.max_jobs = max_jobs
+        self.allow_seed = allow_seed
+        self.games = {}
+        self.server = None
+        self._ids = itertools.count(1)
+        self._jobs = None
+
+    async def start(self, host='127.0.0.1', port=0):
+        """Start listening and return the port served"""
+        self._jobs = asyncio.Semaphore(self.max_jobs)
+        self.server = await asyncio.start_server(self.serve, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def serve(self, reader, writer):
+        """Answer the requests of one connection until it is closed"""
+        pending = asyncio.Semaphore(self.max_pending)
+        tasks = set()
+        games = set()
+        try:
+            while True:
+                await pending.acquire()
+                line = await reader.readline()
+                if not line:
+                    pending.release()
+                    break
+                task = asyncio.ensure_future(
+                    self._answer(line, writer, pending, games))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except (ConnectionError, asyncio.CancelledError):
+            # The client hung up, or the server is shutting down.
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            for game in games:
+                self.games.pop(game, None)
+            writer.close()
+
+    async def _answer(self, line, writer, pending, games):
+        try:
+            reply = await self.handle(line, games)
+            writer.write(json.dumps(reply).encode() + b'\n')
+            await writer.drain()
+        finally:
+            pending.release()
+
+    async def handle(self, line, games=None):
+        """Carry out one request, given as a line of JSON, and return the
+        reply
+
+        games is the set of the ids of the games started by the connection
+        the request came on, which new and close keep up to date.
+        """
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ProtocolError("A request must be a JSON object")
+            request_id = request.get('id')
+            handler = getattr(self, 'op_' + str(request.get('op')), None)
+            if handler is None:
+                raise ProtocolError("Unknown op {!r}".format(
+                    request.get('op')))
+            reply = await handler(request)
+            reply['ok'] = True
+            if games is not None:
+                if request['op'] == 'new':
+                    games.add(reply['game'])
+                elif request['op'] == 'close':
+                    games.discard(request['game'])
+        except (ProtocolError, ValueError, KeyError, TypeError) as error:
+            reply = {'ok': False, 'error': str(error) or repr(error)}
+        except Exception as error:
+            # Every request gets a reply, or its client would wait forever
+            reply = {'ok': False,
+                     'error': "Internal error: {!r}".format(error)}
+        if request_id is not None:
+            reply['id'] = request_id
+        return reply
+
+    async def destinations(self, roll, start, others):
+        """Work out the destinations of a move in the executor"""
+        async with self._jobs:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, Board.available_destinations, roll, start,
+                others)
+
+    def _session(self, request):
+        try:
+            return self.games[request['game']]
+        except KeyError:
+            raise ProtocolError("No game {!r}".format(request.get('game')))
+
+    async def op_new(self, request):
+        if len(self.games) >= self.max_games:
+            raise ProtocolError("The server is full")
+        suspects = request.get('suspects')
+        if (not isinstance(suspects, list) or
+                not 1 <= len(suspects) <= len(SUSPECTS) or
+                not all(isinstance(name, str) and name in _SUSPECT_NAMES
+                        for name in suspects) or
+                len(set(suspects)) != len(suspects)):
+            raise ProtocolError("suspects must be a list of 1 to {} "
+                                "different suspects".format(len(SUSPECTS)))
+        seed = request.get('seed')
+        if seed is not None and not self.allow_seed:
+            raise ProtocolError("This server does not accept seeds")
+        session = GameSession(suspects, seed)
+        game_id = next(self._ids)
+        self.games[game_id] = session
+        return {'game': game_id,
+                'players': [player.character
+                            for player in session.game.players]}
+
+    async def op_state(self, request):
+        return self._session(request).state()
+
+    async def op_roll(self, request):
+        session = self._session(request)
+        async with session.lock:
+            session.check_turn(request['player'], 'roll')
+            player = session.game.players[session.turn]
+            roll = session.rng.randint(1, 6) + session.rng.randint(1, 6)
+            destinations = await self.destinations(roll, player.position,
+                                                   session.others())
+            if destinations:
+                session.phase = 'move'
+                session.destinations = frozenset(destinations)
+            else:
+                session.next_turn()
+            return {'roll': roll,
+                    'destinations': sorted(map(list, destinations))}
+
+    async def op_move(self, request):
+        session = self._session(request)
+        async with session.lock:
+            session.check_turn(request['player'], 'move')
+            to = Location(*request['to'])
+            if to not in session.destinations:
+                raise ProtocolError("{} cannot be reached".format(list(to)))
+            player = session.game.players[session.turn]
+            player.position = to
+            door = Board.is_door(to)
+            if door:
+                session.phase = 'suggest'
+            else:
+                session.next_turn()
+            return {'position': list(to), 'door': door}
+
+    async def op_suggest(self, request):
+        session = self._session(request)
+        async with session.lock:
+            session.check_turn(request['player'], 'suggest')
+            game = session.game
+            refuter, cards = game.refute(game.players[session.turn],
+                                         request['cards'])
+            session.next_turn()
+            if refuter is None:
+                return {'refuter': None, 'card': None}
+            return {'refuter': game.players.index(refuter),
+                    'card': min(card.name for card in cards)}
+
+    async def op_accuse(self, request):
+        session = self._session(request)
+        async with session.lock:
+            session.check_turn(request['player'], 'roll', 'suggest')
+            correct = session.game.accuse(request['cards'])
+            if correct:
+                session.winner = session.turn
+                session.phase = 'over'
+            else:
+                session.eliminated.add(session.turn)
+                session.next_turn()
+            return {'correct': correct, 'winner': session.winner}
+
+    async def op_close(self, request):
+        session = self._session(request)
+        async with session.lock:
+            del self.games[request['game']]
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--max-games', type=int, default=10000)
+    parser.add_argument('--allow-seed', action='store_true',
+                        help="let clients seed games, for load tests only")
+    args = parser.parse_args()
+
+    async def run():
+        server = GameServer(ProcessPoolExecutor(args.processes),
+                            args.max_games, allow_seed=args.allow_seed)
+        port = await server.start(args.host, args.port)
+        print("Serving Sleuth games on {}:{}".format(args.host, port))
+        await server.server.serve_forever()
+
+    asyncio.run(run())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""Self-play of whole Sleuth games, spread over a pool of processes
+
+Every game is played by scripted players and is seeded from the batch seed
+and its own index, so a game plays out the same way whichever worker runs
+it and in whatever order the games finish. simulate() yields the result of
+each game as soon as it is done.
+
+Run from the command line to play a batch and report the throughput:
+
+    python simulation.py 10000 --processes 32 --seed 1
+"""
+import argparse
+import random
+import time
+from collections import namedtuple
+from functools import partial
+from multiprocessing import Pool
+
+from board import Board
+from sleuth import Sleuth, roomCards, suspectCards, weaponCards
+
+
+GameResult = namedtuple('GameResult', ['index', 'winner', 'turns',
+                                       'suggestions', 'solution'])
+
+DEFAULT_SUSPECTS = ("Mrs. White", "Mr. Green", "Miss Scarlet",
+                    "Professor Plum", "Colonel Mustard", "Ms. Peacock")
+
+
+class ScriptedPlayer(object):
+    """A simple bot which plays a Player's turns
+
+    The bot suggests cards it has not yet seen, crosses off each card it is
+    shown and accuses once a single card is left in every category. It
+    heads for the nearest door, preferring rooms it has not seen, and
+    suggests the room whenever it enters one.
+    """
+
+    def __init__(self, player, rng):
+        self.player = player
+        self.rng = rng
+        self.eliminated = False
+        held = {card.name for card in player.hand}
+        self.unseen = dict(
+            (category, sorted(name for name, _ in cards if name not in held))
+            for category, cards in (('s', suspectCards), ('w', weaponCards),
+                                    ('r', roomCards)))
+
+    def accusation(self):
+        """Return the cards to accuse with, or None if not yet sure"""
+        if all(len(names) == 1 for names in self.unseen.values()):
+            return [names[0] for names in self.unseen.values()]
+        return None
+
+    def suggestion(self, room):
+        """Return a suspect and weapon which have not been seen, and the
+        room the player is in"""
+        return [self.rng.choice(self.unseen[category])
+                for category in ('s', 'w')] + [room]
+
+    def shown(self, card):
+        """Cross off a card shown in answer to a suggestion"""
+        names = self.unseen[card.catagory]
+        if card.name in names and len(names) > 1:
+            names.remove(card.name)
+
+    def choose_destination(self, destinations):
+        """Pick a door to enter, of a room not yet seen if there is one, or
+        else the tile nearest to a door"""
+        layout = Board.layout()
+        doors = [location for location in destinations
+                 if layout.number(location) in layout.doors and
+                 location != self.player.position]
+        unseen = [door for door in doors
+                  if Board.room_of(door) in self.unseen['r']]
+        if unseen or doors:
+            return self.rng.choice(sorted(unseen or doors))
+
+        door_distance = {}
+        for location in destinations:
+            distances = [layout.distances.distance(layout.number(location),
+                                                   door)
+                         for door in layout.doors]
+            door_distance[location] = min(distance for distance in distances
+                                          if distance is not None)
+
+        nearest = min(door_distance.values())
+        return self.rng.choice(sorted(location for location in destinations
+                                      if door_distance[location] == nearest))
+
+
+def play_game(index, seed=0, suspects=DEFAULT_SUSPECTS, max_turns=2000,
+              turn_times=None):
+    """Play one game with scripted players and return its GameResult
+
+    If turn_times is a list, the time taken by every turn which moved a
+    player is appended to it.
+    """
+    rng = random.Random("{}:{}".format(seed, index))
+    game = Sleuth(list(suspects), rng)
+    bots = [ScriptedPlayer(player, rng) for player in game.players]
+    suggestions = 0
+
+    for turn in range(1, max_turns + 1):
+        bot = bots[(turn - 1) % len(bots)]
+        if bot.eliminated:
+            if all(other.eliminated for other in bots):
+                return GameResult(index, None, turn, suggestions,
+                                  _solution(game))
+            continue
+
+        accusation = bot.accusation()
+        if accusation is not None:
+            if game.accuse(accusation):
+                return GameResult(index, bot.player.character, turn,
+                                  suggestions, _solution(game))
+            bot.eliminated = True
+            continue
+
+        if turn_times is not None:
+            started = time.perf_counter()
+        roll = rng.randint(1, 6) + rng.randint(1, 6)
+        others = {other.player.position for other in bots if other is not bot}
+        destinations = Board.available_destinations(
+            roll, bot.player.position, others)
+        if not destinations:
+            continue
+
+        bot.player.position = bot.choose_destination(destinations)
+        if Board.is_door(bot.player.position):
+            suggestions += 1
+            refuter, cards = game.refute(
+                bot.player, bot.suggestion(Board.room_of(bot.player.position)))
+            if refuter is not None:
+                bot.shown(rng.choice(sorted(cards, key=str)))
+        if turn_times is not None:
+            turn_times.append(time.perf_counter() - started)
+
+    return GameResult(index, None, max_turns, suggestions, _solution(game))
+
+
+def _solution(game):
+    return tuple(sorted(card.name for card in game.solution))
+
+
+def simulate(games, seed=0, suspects=DEFAULT_SUSPECTS, processes=None,
+             chunksize=8):
+    """Play many games across a pool of processes
+
+    Yields a GameResult for each game as soon as it finishes, so results
+    arrive out of order; each carries the index of its game. The results
+    for a given seed are the same however many processes are used.
+    """
+    play = partial(play_game, seed=seed, suspects=tuple(suspects))
+    with Pool(processes) as pool:
+        for result in pool.imap_unordered(play, range(games), chunksize):
+            yield result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('games', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--players', type=int, default=len(DEFAULT_SUSPECTS))
+    args = parser.parse_args()
+
+    started = time.time()
+    wins = turns = 0
+    for result in simulate(args.games, args.seed,
+                           DEFAULT_SUSPECTS[:args.players], args.processes):
+        wins += result.winner is not None
+        turns += result.turns
+    elapsed = time.time() - started
+
+    print("{} games, {} won, {} turns in {:.2f}s ({:.1f} games/s)".format(
+        args.games, wins, turns, elapsed, args.games / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -9,58 +9,177 @@
 # Licence:     <your licence>
 #-------------------------------------------------------------------------------
 #!/usr/bin/env python
+import random
 from itertools import cycle
-from random import shuffle
 
 from Player import Player
-from GameBoard import GameBoard
+from board import Board
+from cards import (CARDS, ROOMS, SUSPECTS, WEAPONS, Card, card_mask, cards_in,
+                   roomCards, suspectCards, weaponCards)
 
-weaponCards = [("Lead Pipe", "w"), ("Candlestick", "w"), ("Revolver", "w"), ("Rope" , "w"), ("Knife", "w"), ("Wrench", "w")]
-roomCards = [("Conservatory", "r"), ("Kitchen", "r"), ("Billards Room", "r"), ("Ballroom","r"), ("Hall","r"), ("Dining Room","r"), ("Study","r"), ("Lounge", "r"), ("Library", "r")]
-suspectCards = [("Mrs. White", "s"), ("Mr. Green", "s"), ("Miss Scarlet","s"), ("Professor Plum","s"), ("Colonel Mustard","s"), ("Ms. Peacock","s")]
 suspects = ["Mr. Green", "Professor Plum", "Miss Scarlet"]  # DEBUG
 
 
 class Sleuth(object):
-    _board = GameBoard()
+    """A game of Sleuth
 
-    def __init__(self, suspects):
-        self.player_count = len(suspects)
-        self.players = [Player(s) for s in suspects]
-        deck = Deck()
-        self.solution = deck.solution
-        deck.deal(self.players)
+    The game is played on the Board unless another board class, such as
+    one from boards.load(), is given. turn is the index of the player whose
+    turn it is, and history holds a
+    (suggester, suggestion mask, refuter) tuple for every suggestion
+    refuted, or not, with the refuter None when nobody could refute it.
+    """
+    _board = Board
+
+    def __init__(self, suspects, rng=None, board=None):
+        self._seat(suspects, *Deck.deal_masks(len(suspects), rng),
+                   board=board)
 
     @classmethod
-    def board(cls):
-        return cls._board
+    def from_masks(cls, suspects, solution_mask, hands, board=None):
+        """Start a game with the given deal instead of a random one"""
+        game = cls.__new__(cls)
+        game._seat(suspects, solution_mask, hands, board)
+        return game
+
+    def _seat(self, suspects, solution_mask, hands, board=None):
+        if board is not None:
+            self._board = board
+        self.player_count = len(suspects)
+        self.players = [Player(s, self._board.start(s)) for s in suspects]
+        self.solution_mask = solution_mask
+        for player, hand in zip(self.players, hands):
+            player.hand_mask = hand
+        self.turn = 0
+        self.history = []
+
+    def board(self):
+        """Return the Board class the game is played on"""
+        return self._board
+
+    @property
+    def solution(self):
+        """The set of Cards in the solution"""
+        return cards_in(self.solution_mask)
+
+    def refuters(self, suggestion):
+        """Determine which players could refute a suggestion
+
+        The suggestion is given as Cards or card names. Returns a bitmask
+        with bit i set when self.players[i] holds any of the cards.
+        """
+        mask = card_mask(suggestion)
+        refuters = 0
+        for i, player in enumerate(self.players):
+            if player.hand_mask & mask:
+                refuters |= 1 << i
+        return refuters
+
+    def refute(self, suggester, suggestion):
+        """Find the player who must refute a suggestion
+
+        The players after the suggester are asked in turn order. Returns the
+        first player holding any of the suggested cards, given as Cards or
+        by name, together with the set of those cards, or (None, set()) if
+        nobody can refute the suggestion. The suggestion is added to the
+        history.
+        """
+        mask = card_mask(suggestion)
+        index = self.players.index(suggester)
+        for player in self.players[index + 1:] + self.players[:index]:
+            if player.hand_mask & mask:
+                self.history.append((index, mask, self.players.index(player)))
+                return player, cards_in(player.hand_mask & mask)
+        self.history.append((index, mask, None))
+        return None, set()
+
+    def accuse(self, accusation):
+        """Determine if an accusation, given as Cards or by name, is correct"""
+        return card_mask(accusation) == self.solution_mask
 
 
 class Room(object):
-    def __init__(self, neighbors, room_name):
-        self.name = room_name
+    """A room of the board and how far away the other rooms are
 
+    neighbors maps the name of each other room which can be reached to the
+    fewest steps from a door of this room into it, and doors holds the
+    Locations of this room's doors.
+    """
 
-class Card (object):
-    def __init__(self, name, catagory):
-        self.name = name
-        self.catagory = catagory
+    def __init__(self, neighbors, room_name, doors=()):
+        self.name = room_name
+        self.neighbors = dict(neighbors)
+        self.doors = tuple(doors)
 
-    def __str__(self):
-        return self.name
+    @classmethod
+    def graph(cls, board=Board):
+        """Return a dict of every Room of a board, by name"""
+        rooms = {}
+        for name in board.room_names():
+            neighbors = {}
+            for other in board.room_names():
+                if other != name:
+                    distance = board.room_distance(name, other)
+                    if distance is not None:
+                        neighbors[other] = distance
+            rooms[name] = cls(neighbors, name, board.room_doors(name))
+        return rooms
+
+    def within(self, roll):
+        """Return the names of the rooms which a roll reaches from here"""
+        return {name for name, distance in self.neighbors.items()
+                if distance <= roll}
 
 
 class Deck(object):
-    def __init__(self):
-        self.weaponCards = [Card(arg1, arg2) for arg1, arg2 in weaponCards]
-        self.roomCards = [Card(arg1, arg2) for arg1, arg2 in roomCards]
-        self.suspectCards = [Card(arg1, arg2) for arg1, arg2 in suspectCards]
-        shuffle(self.weaponCards)
-        shuffle(self.suspectCards)
-        shuffle(self.roomCards)
+    def __init__(self, rng=None):
+        rng = random if rng is None else rng
+        self.weaponCards = list(WEAPONS)
+        self.roomCards = list(ROOMS)
+        self.suspectCards = list(SUSPECTS)
+        rng.shuffle(self.weaponCards)
+        rng.shuffle(self.suspectCards)
+        rng.shuffle(self.roomCards)
         self.solution = self.solution()
         self.deck = self.buildDeck()
 
+    @staticmethod
+    def deal_masks(player_count, rng=None):
+        """Deal a game as card bitmasks without building a Deck
+
+        Bit n of a mask stands for CARDS[n]. One card of each category is
+        drawn for the solution and the rest are dealt round the players in
+        turn, as deal() does, so the first players may hold one card more
+        than the others. Pass a seeded random.Random as rng for a
+        reproducible deal. No Card lists are built.
+
+        Returns the solution mask and a list of hand masks, one per player.
+        """
+        # Ordering the cards by random keys shuffles them. The first card of
+        # each category goes to the solution, as if each category had been
+        # shuffled on its own and its top card drawn.
+        key = (random if rng is None else rng).random
+        solution = 0
+        hands = [0] * player_count
+        drawn = set()
+        dealt = 0
+        for number in sorted(range(len(CARDS)), key=lambda _: key()):
+            catagory = CARDS[number].catagory
+            if catagory not in drawn:
+                drawn.add(catagory)
+                solution |= 1 << number
+            else:
+                hands[dealt % player_count] |= 1 << number
+                dealt += 1
+        return solution, hands
+
+    @staticmethod
+    def hand_sizes(player_count):
+        """Return the number of cards deal() gives each player"""
+        dealt = len(CARDS) - 3
+        return [dealt // player_count + (i < dealt % player_count)
+                for i in range(player_count)]
+
     def buildDeck(self):
         return (self.weaponCards + self.suspectCards + self.roomCards)
 
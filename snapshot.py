@@ -0,0 +1,114 @@
+"""A compact binary snapshot of a Sleuth game
+
+A snapshot holds the players' characters, positions and hands, the
+solution, whose turn it is and the history of suggestions, packed into
+fixed width fields with struct:
+
+    header      version, players, turn, solution mask, history length
+    player      character, x, y, hand mask             (for each player)
+    suggestion  suggester, suggestion mask, refuter    (for each)
+
+Characters are numbered in the order of cards.SUSPECTS, card masks are the
+card bitmasks of cards.py and a refuter of 255 means nobody refuted. All
+numbers are little endian. A six player game without history takes 51
+bytes, and each suggestion adds 6.
+
+loads() reads straight out of any buffer, such as a memoryview of a larger
+file, without copying it first.
+"""
+import struct
+
+from board import Location
+from cards import SUSPECTS
+from sleuth import Sleuth
+
+VERSION = 1
+
+_header = struct.Struct('<BBBIH')
+_player = struct.Struct('<BBBI')
+_suggestion = struct.Struct('<BIB')
+_NOBODY = 255
+
+_characters = [card.name for card in SUSPECTS]
+_numbers = dict((name, number) for number, name in enumerate(_characters))
+
+
+class SnapshotError(Exception):
+    """Raised for data which is not a snapshot this version can read"""
+
+
+def size(game):
+    """Return the number of bytes in the snapshot of a game"""
+    return (_header.size + _player.size * len(game.players) +
+            _suggestion.size * len(game.history))
+
+
+def dumps(game):
+    """Return the snapshot of a game as bytes"""
+    data = bytearray(size(game))
+    dump_into(game, data)
+    return bytes(data)
+
+
+def dump_into(game, buffer, offset=0):
+    """Write the snapshot of a game into a writable buffer at an offset
+
+    Returns the offset just past the snapshot.
+    """
+    _header.pack_into(buffer, offset, VERSION, len(game.players), game.turn,
+                      game.solution_mask, len(game.history))
+    offset += _header.size
+    for player in game.players:
+        _player.pack_into(buffer, offset, _numbers[player.character],
+                          player.position[0], player.position[1],
+                          player.hand_mask)
+        offset += _player.size
+    for suggester, mask, refuter in game.history:
+        _suggestion.pack_into(buffer, offset, suggester, mask,
+                              _NOBODY if refuter is None else refuter)
+        offset += _suggestion.size
+    return offset
+
+
+def loads(data, offset=0):
+    """Rebuild a Sleuth game from a snapshot in a buffer"""
+    return load_from(data, offset)[0]
+
+
+def load_from(data, offset=0):
+    """Rebuild a Sleuth game from a snapshot at an offset in a buffer
+
+    Returns the game and the offset just past the snapshot.
+    """
+    data = memoryview(data)
+    try:
+        version, players, turn, solution, history = _header.unpack_from(
+            data, offset)
+        if version != VERSION:
+            raise SnapshotError("Cannot read version {} snapshots".format(
+                version))
+        offset += _header.size
+
+        seats = []
+        for _ in range(players):
+            seats.append(_player.unpack_from(data, offset))
+            offset += _player.size
+        suggestions = []
+        for _ in range(history):
+            suggester, mask, refuter = _suggestion.unpack_from(data, offset)
+            suggestions.append((suggester, mask,
+                                None if refuter == _NOBODY else refuter))
+            offset += _suggestion.size
+    except struct.error as error:
+        raise SnapshotError("Truncated snapshot: {}".format(error))
+
+    try:
+        game = Sleuth.from_masks([_characters[seat[0]] for seat in seats],
+                                 solution, [seat[3] for seat in seats])
+    except IndexError:
+        raise SnapshotError("Unknown character in snapshot")
+    for player, seat in zip(game.players, seats):
+        player.position = Location(seat[1], seat[2])
+    game.turn = turn
+    game.history = suggestions
+    return game, offset
@@ -1,8 +1,15 @@
 import pytest
 
-from board import (Board, Location, NotCorrectTileError,
+from board import (Board, DestinationCache, Destination, Location,
+                   NotCorrectTileError, ROLL_CHANCES,
                    ShouldNotBeInstantiated, INACCESSABLE, NORMAL, DOOR_EW,
                    DOOR_NS, IncompatibleInterfaceException)
+from grid import grid
+
+
+ACCESSABLE_TILES = [Location(x, y)
+                    for y, row in enumerate(grid)
+                    for x, tile in enumerate(row) if tile]
 
 @pytest.mark.parametrize(('inpt', 'expected'), [
     (0, INACCESSABLE),
@@ -80,11 +87,326 @@ def test_in_board(inpt, expected):
 #    assert Board.is_accessable(loc, doorloc) == expected
 
 
+def recursive_destinations(roll, start_location, exclude):
+    """The original recursive movement rules, kept as a reference"""
+    if roll == 0:
+        return {start_location}
+
+    legal_moves = set()
+    for location in Board.adjacent_locations(start_location):
+        if location in exclude:
+            continue
+
+        if not Board.in_board(location) or not Board.is_accessable(location):
+            continue
+
+        if (Board.is_door(location) and
+                not Board.door_accessable(start_location, location)):
+            continue
+
+        if Board.is_door(location):
+            destinations = {location}
+        else:
+            destinations = recursive_destinations(
+                roll - 1, location, exclude.union({start_location}))
+
+        legal_moves.update(destinations)
+    return legal_moves
+
+@pytest.mark.parametrize('roll', range(1, 13))
+def test_available_destinations_matches_recursion(roll):
+    for start in ACCESSABLE_TILES:
+        assert (Board.available_destinations(roll, start, set()) ==
+                recursive_destinations(roll, start, set()))
+
+@pytest.mark.parametrize(('roll', 'start', 'exclude'), [
+    (6, Location(7, 8), {Location(8, 8), Location(6, 9)}),
+    (8, Location(16, 17), {Location(15, 17), Location(16, 16)}),
+    (9, Location(9, 0), {Location(8, 1), Location(7, 3)}),
+    (12, Location(23, 6), {Location(17, 7), Location(16, 6)}),
+])
+def test_available_destinations_with_blocked_tiles(roll, start, exclude):
+    assert (Board.available_destinations(roll, start, exclude) ==
+            recursive_destinations(roll, start, exclude))
+
+@pytest.mark.parametrize(('roll', 'start', 'expected'), [
+    (0, Location(7, 8), {Location(7, 8)}),
+    (1, Location(9, 8), {Location(9, 7), Location(8, 8), Location(10, 8),
+                         Location(9, 9)}),
+    (2, Location(10, 8), {Location(9, 7), Location(8, 8), Location(9, 9),
+                          Location(11, 9), Location(12, 8)}),
+])
+def test_available_destinations(roll, start, expected):
+    assert Board.available_destinations(roll, start, set()) == expected
+
+@pytest.mark.parametrize(('start', 'end', 'expected'), [
+    (Location(7, 8), Location(7, 8), 0),
+    (Location(9, 8), Location(9, 7), 1),
+    (Location(9, 7), Location(9, 8), 1),
+    (Location(0, 7), Location(7, 12), 14),
+    (Location(8, 12), Location(7, 12), 1),
+    (Location(8, 11), Location(7, 12), 2),
+    (Location(7, 12), Location(8, 11), 2),
+])
+def test_distance(start, end, expected):
+    assert Board.distance(start, end) == expected
+
+def test_distance_not_accessable():
+    with pytest.raises(NotCorrectTileError):
+        Board.distance(Location(0, 0), Location(7, 8))
+
+@pytest.mark.parametrize('roll', range(1, 13))
+def test_doors_within_matches_destinations(roll):
+    for start in ACCESSABLE_TILES:
+        doors = {location for location in
+                 Board.available_destinations(roll, start, set())
+                 if Board.is_door(location)}
+        assert Board.doors_within(roll, start) == doors
+
+def rooms_entered(roll, start, exclude):
+    return {Board.room_of(location) for location in
+            Board.available_destinations(roll, start, exclude)
+            if Board.is_door(location) and location != start}
+
+@pytest.mark.parametrize('roll', range(1, 13))
+def test_rooms_within_matches_destinations(roll):
+    for start in ACCESSABLE_TILES:
+        assert Board.rooms_within(roll, start) == rooms_entered(roll, start,
+                                                                set())
+
+@pytest.mark.parametrize(('roll', 'start', 'exclude'), [
+    (6, Location(6, 16), {Location(6, 17)}),
+    (4, Location(9, 8), {Location(9, 7)}),
+    (12, Location(16, 9), {Location(17, 9), Location(16, 10)}),
+    (5, Location(9, 8), {Location(20, 20)}),
+    (16, Location(9, 0), {Location(4, 6)}),
+    (14, Location(9, 0), {Location(7, 5)}),
+])
+def test_rooms_within_with_blocked_tiles(roll, start, exclude):
+    assert Board.rooms_within(roll, start, exclude) == rooms_entered(
+        roll, start, exclude)
+
+def test_room_distances():
+    names = Board.room_names()
+    assert len(names) == 9
+    for room in names:
+        for other in names:
+            if other != room:
+                distances = [Board.distance(door, other_door)
+                             for door in Board.room_doors(room)
+                             for other_door in Board.room_doors(other)]
+                assert Board.room_distance(room, other) == min(
+                    distance for distance in distances if distance)
+    assert Board.room_doors("Hall") == [Location(11, 18), Location(12, 18),
+                                        Location(14, 20)]
+
+@pytest.mark.parametrize(('roll', 'start', 'location', 'expected'), [
+    (1, Location(9, 8), Location(9, 7), True),
+    (2, Location(7, 8), Location(9, 7), False),
+    (3, Location(7, 8), Location(9, 7), True),
+    (4, Location(7, 8), Location(7, 12), False),
+])
+def test_within_reach(roll, start, location, expected):
+    assert Board.within_reach(roll, start, location) == expected
+
+def walking_distance(start, door, exclude):
+    """Steps from a tile into a door by breadth first search, or None"""
+    steps = {start: 0}
+    queue = [start]
+    for location in queue:
+        if location == door:
+            return steps[door]
+        if location != start and Board.is_door(location):
+            continue
+        for step in Board.adjacent_locations(location):
+            if (step in steps or step in exclude or not Board.in_board(step)
+                    or not Board.is_accessable(step)):
+                continue
+            if Board.is_door(step) and not Board.door_accessable(location,
+                                                                 step):
+                continue
+            steps[step] = steps[location] + 1
+            queue.append(step)
+    return None
+
+def check_path(path, start, door, exclude):
+    layout = Board.layout()
+    if walking_distance(start, door, exclude) is None:
+        assert path is None
+        return
+    assert path[0] == start and path[-1] == door
+    for here, there in zip(path, path[1:]):
+        assert layout.number(there) in layout.moves[layout.number(here)]
+    assert not any(Board.is_door(location) for location in path[1:-1])
+    assert not exclude.intersection(path[1:])
+    assert len(path) - 1 == walking_distance(start, door, exclude)
+
+@pytest.mark.parametrize('start', [Location(9, 0), Location(0, 17),
+                                   Location(7, 12), Location(16, 9)])
+def test_path_to(start):
+    for door in Board.layout().doors:
+        door = Board.layout().location(door)
+        path = Board.path_to(start, door)
+        if door == start:
+            assert path == [start]
+        else:
+            check_path(path, start, door, set())
+
+@pytest.mark.parametrize(('start', 'door', 'exclude'), [
+    (Location(9, 0), Location(4, 6), {Location(7, 6), Location(8, 5)}),
+    (Location(7, 8), Location(7, 12), {Location(7, 9), Location(6, 10)}),
+    (Location(16, 17), Location(17, 21), {Location(16, 18), Location(17, 18)}),
+])
+def test_path_to_around_players(start, door, exclude):
+    check_path(Board.path_to(start, door, exclude), start, door, exclude)
+
+def test_path_to_blocked():
+    assert Board.path_to(Location(9, 0), Location(4, 6),
+                         {Location(9, 1)}) is None
+    assert Board.path_to(Location(9, 0), Location(4, 6),
+                         {Location(4, 6)}) is None
+    with pytest.raises(NotCorrectTileError):
+        Board.path_to(Location(9, 0), Location(7, 8))
+    with pytest.raises(NotCorrectTileError):
+        Board.path_to(Location(0, 0), Location(4, 6))
+
+def chances_by_roll(start, exclude):
+    chances = {}
+    for roll, chance in ROLL_CHANCES.items():
+        for location in Board.available_destinations(roll, start, exclude):
+            chances[location] = chances.get(location, 0) + chance
+    return chances
+
+def test_roll_chances():
+    assert sum(ROLL_CHANCES.values()) == pytest.approx(1)
+    assert ROLL_CHANCES[7] == pytest.approx(1 / 6.0)
+
+@pytest.mark.parametrize(('start', 'exclude'), [
+    (Location(9, 0), set()),
+    (Location(7, 12), set()),
+    (Location(16, 17), {Location(15, 17), Location(16, 16)}),
+    (Location(7, 8), {Location(8, 8), Location(6, 9)}),
+])
+def test_reach_chances(start, exclude):
+    chances = Board.reach_chances(start, exclude)
+    expected = chances_by_roll(start, exclude)
+    assert set(chances) == set(expected)
+    for location, chance in chances.items():
+        assert chance == pytest.approx(expected[location])
+        assert 0 < chance <= 1
+
+def test_reach_chances_cached_for_start_squares(monkeypatch):
+    monkeypatch.setattr(Board, '_chances', DestinationCache(maxsize=8))
+    start = Board.start("Mrs. White")
+    chances = Board.reach_chances(start)
+    chances[start] = 2
+    assert Board.reach_chances(start) == pytest.approx(
+        chances_by_roll(start, set()))
+    assert Board._chances.stats()['hits'] == 1
+    # Players far away do not change the map
+    Board.reach_chances(start, {Location(20, 20)})
+    assert Board._chances.stats()['hits'] == 2
+    Board.reach_chances(Location(7, 8))
+    assert len(Board._chances) == 1
+    with pytest.raises(NotCorrectTileError):
+        Board.reach_chances(Location(0, 0))
+
+@pytest.mark.parametrize('roll', [0, 1, 4, 7, 12])
+def test_stream_destinations_matches_destinations(roll):
+    for start in ACCESSABLE_TILES:
+        streamed = list(Board.stream_destinations(roll, start))
+        assert ({destination.location for destination in streamed} ==
+                Board.available_destinations(roll, start, set()))
+        assert len(streamed) == len({d.location for d in streamed})
+        assert [d.steps for d in streamed] == sorted(d.steps for d in streamed)
+        for destination in streamed:
+            assert destination.door == Board.is_door(destination.location)
+            if destination.door and destination.location != start:
+                assert destination.steps == Board.distance(
+                    start, destination.location)
+
+def test_stream_destinations_with_blocked_tiles():
+    start, exclude = Location(7, 8), {Location(8, 8), Location(6, 9)}
+    assert ({d.location for d in
+             Board.stream_destinations(6, start, exclude)} ==
+            recursive_destinations(6, start, exclude))
+
+def test_stream_destinations_stops_early(monkeypatch):
+    expanded = []
+    expand = Board._expand
+    def counting(*args):
+        expanded.append(args[2])
+        return expand(*args)
+    monkeypatch.setattr(Board, '_expand', staticmethod(counting))
+
+    nearest = next(Board.stream_destinations(12, Location(7, 8)))
+    assert nearest == Destination(Location(9, 7), 3, True)
+    assert len(expanded) == 3
+
+def test_layout_follows_grid(monkeypatch):
+    monkeypatch.setattr(Board, '_grid', [[1, 2], [3, 0]])
+    assert list(Board.layout().tiles) == [NORMAL, DOOR_EW, DOOR_NS,
+                                         INACCESSABLE]
+    assert Board.tile_at(Location(1, 0)) == DOOR_EW
+    assert not Board.in_board(Location(2, 0))
 
+def test_tile_at_off_board():
+    with pytest.raises(IndexError):
+        Board.tile_at(Location(-1, 5))
 
+def test_available_destinations_exclude_tuples():
+    blocked = {Location(9, 9), Location(8, 8)}
+    assert (Board.available_destinations(3, Location(9, 8), {(9, 9), (8, 8)}) ==
+            Board.available_destinations(3, Location(9, 8), blocked))
 
+def test_layout_moves_follow_door_rules():
+    layout = Board.layout()
+    for number, moves in enumerate(layout.moves):
+        location = layout.location(number)
+        expected = {step for step in Board.adjacent_locations(location)
+                    if Board.in_board(step) and Board.is_accessable(step) and
+                    (not Board.is_door(step) or
+                     Board.door_accessable(location, step))}
+        assert {layout.location(step) for step in moves} == expected
 
+def test_batch_destinations():
+    blocked = frozenset({Location(8, 8), Location(16, 17)})
+    requests = [(start, roll, exclude)
+                for start in (Location(7, 8), Location(9, 7), Location(16, 18))
+                for roll in range(0, 13)
+                for exclude in (frozenset(), blocked)]
+    results = Board.batch_destinations(requests)
+    assert len(results) == len(requests)
+    for start, roll, exclude in requests:
+        assert (results[start, roll, exclude] ==
+                Board.available_destinations(roll, start, exclude))
 
+@pytest.fixture
+def cache(monkeypatch):
+    cache = DestinationCache(maxsize=2)
+    monkeypatch.setattr(Board, '_cache', cache)
+    return cache
 
+def test_destination_cache_hits(cache):
+    start = Location(7, 8)
+    first = Board.available_destinations(4, start, set())
+    first.clear()
+    assert (Board.available_destinations(4, start, {Location(23, 19)}) ==
+            recursive_destinations(4, start, set()))
+    assert cache.stats() == {'size': 1, 'maxsize': 2, 'hits': 1,
+                             'misses': 1, 'evictions': 0}
 
+def test_destination_cache_evictions(cache):
+    for roll in (2, 3, 4, 2):
+        Board.available_destinations(roll, Location(7, 8), set())
+    assert (cache.hits, cache.misses, cache.evictions) == (0, 4, 2)
+    cache.resize(1)
+    assert len(cache) == 1
+    assert cache.evictions == 3
 
+def test_destination_cache_board_swap(cache, monkeypatch):
+    Board.available_destinations(1, Location(0, 0), set())
+    monkeypatch.setattr(Board, '_grid', [[1, 1], [1, 1]])
+    assert (Board.available_destinations(1, Location(0, 0), set()) ==
+            {Location(1, 0), Location(0, 1)})
+    assert cache.hits == 0
@@ -0,0 +1,91 @@
+import random
+
+import pytest
+
+from board import Board, Location
+from cards import (ROOM_MASK, SUSPECT_MASK, WEAPON_MASK, card_mask,
+                   cards_in)
+from Player import Player
+from sleuth import CARDS, ROOMS, SUSPECTS, WEAPONS, Card, Deck, Room, Sleuth
+
+
+def test_sleuth_seeded_deal():
+    first = Sleuth(["Mr. Green", "Miss Scarlet"], random.Random(3))
+    second = Sleuth(["Mr. Green", "Miss Scarlet"], random.Random(3))
+    assert ({card.name for card in first.solution} ==
+            {card.name for card in second.solution})
+    assert ([{card.name for card in player.hand} for player in first.players] ==
+            [{card.name for card in player.hand} for player in second.players])
+
+def test_refute_and_accuse():
+    game = Sleuth(["Mr. Green", "Miss Scarlet", "Ms. Peacock"],
+                  random.Random(5))
+    green, scarlet, peacock = game.players
+    card = next(iter(peacock.hand))
+    refuter, cards = game.refute(green, [card.name])
+    assert refuter is peacock and cards == {card}
+    assert game.refute(green, [c.name for c in game.solution]) == (None, set())
+    assert game.accuse([c.name for c in game.solution])
+    assert not game.accuse([card.name])
+
+@pytest.mark.parametrize('player_count', [3, 4, 6])
+def test_deal_masks(player_count):
+    solution, hands = Deck.deal_masks(player_count, random.Random(player_count))
+    assert len(hands) == player_count
+    assert bin(solution).count('1') == 3
+    for cards in (WEAPONS, ROOMS, SUSPECTS):
+        assert sum(solution >> CARDS.index(card) & 1 for card in cards) == 1
+
+    combined = solution
+    for hand in hands:
+        assert not combined & hand
+        combined |= hand
+    assert combined == (1 << len(CARDS)) - 1
+
+    sizes = [bin(hand).count('1') for hand in hands]
+    assert sizes == sorted(sizes, reverse=True)
+    assert sizes[0] - sizes[-1] <= 1
+    assert sizes == Deck.hand_sizes(player_count)
+
+def test_deal_masks_is_reproducible():
+    assert (Deck.deal_masks(4, random.Random(11)) ==
+            Deck.deal_masks(4, random.Random(11)))
+
+def test_decks_share_cards():
+    first, second = Deck(random.Random(1)), Deck(random.Random(2))
+    assert ({id(card) for card in first.deck + list(first.solution)} ==
+            {id(card) for card in second.deck + list(second.solution)})
+    assert Card("Rope", "w") == WEAPONS[3]
+
+def test_card_masks():
+    assert cards_in(card_mask(["Rope", ROOMS[0]])) == {WEAPONS[3], ROOMS[0]}
+    assert card_mask(WEAPONS) == WEAPON_MASK
+    assert WEAPON_MASK | ROOM_MASK | SUSPECT_MASK == (1 << len(CARDS)) - 1
+
+def test_player_hand_mask():
+    player = Player("Mrs. White")
+    player.addCard(SUSPECTS[1])
+    player.addCard(WEAPONS[0])
+    assert player.hand_mask == card_mask([SUSPECTS[1], WEAPONS[0]])
+    assert player.hand == {SUSPECTS[1], WEAPONS[0]}
+
+def test_refuters():
+    game = Sleuth(["Mr. Green", "Miss Scarlet", "Ms. Peacock"],
+                  random.Random(8))
+    for card in CARDS:
+        expected = sum(1 << i for i, player in enumerate(game.players)
+                       if card in player.hand)
+        assert game.refuters([card]) == expected
+    assert game.refuters(game.solution) == 0
+    assert game.accuse(game.solution)
+
+def test_room_graph():
+    rooms = Room.graph()
+    assert sorted(rooms) == sorted(card.name for card in ROOMS)
+    kitchen = rooms["Kitchen"]
+    assert kitchen.doors == (Location(4, 6),)
+    assert "Kitchen" not in kitchen.neighbors
+    assert kitchen.neighbors["Ballroom"] == Board.room_distance("Kitchen",
+                                                                "Ballroom")
+    assert kitchen.within(kitchen.neighbors["Ballroom"]) >= {"Ballroom"}
+    assert kitchen.within(1) == set()
@@ -0,0 +1,23 @@
+import cProfile
+import pstats
+
+import bench_games
+from simulation import DEFAULT_SUSPECTS, play_game
+
+
+def test_workload():
+    result = bench_games.workload(3, 2, seed=5)
+    assert result['games'] == 2
+    assert result['turns'] == sum(
+        play_game(index, 5, DEFAULT_SUSPECTS[:3]).turns for index in range(2))
+    assert result['games_per_second'] > 0
+    assert 0 < result['turn_seconds']['p50'] <= result['turn_seconds']['p99']
+    assert result['peak_rss_bytes'] > 2 ** 20
+    assert bench_games.report(result).startswith("3 players: 2 games")
+
+def test_run_under_profile():
+    profile = cProfile.Profile()
+    results = bench_games.run((3, 4), games=1, seed=1, profile=profile)
+    assert [result['players'] for result in results] == [3, 4]
+    functions = [name for _, _, name in pstats.Stats(profile).stats]
+    assert 'available_destinations' in functions
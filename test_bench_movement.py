@@ -0,0 +1,32 @@
+import bench_movement
+from board import Board
+
+
+def report(seconds, peak, calibration=1.0):
+    return {'calibration': calibration,
+            'results': {'tile_at': {'seconds_per_call': seconds,
+                                    'peak_bytes_per_call': peak}}}
+
+def test_run_a_benchmark():
+    maxsize = Board.destination_cache().maxsize
+    results = bench_movement.run(repeat=1, only='destinations/roll=3')
+    assert list(results) == ['destinations/roll=3']
+    result = results['destinations/roll=3']
+    assert result['calls'] == len(bench_movement.starts())
+    assert result['seconds_per_call'] > 0
+    assert result['peak_bytes_per_call'] > 0
+    assert Board.destination_cache().maxsize == maxsize
+
+def test_starts_cover_suspects_and_doors():
+    starts = bench_movement.starts()
+    assert len(starts) == 6 + len(Board.layout().doors)
+
+def test_compare():
+    baseline = report(1e-6, 100)
+    assert bench_movement.compare(report(1.1e-6, 100), baseline) == []
+    assert bench_movement.compare(report(2e-6, 100), baseline) == [
+        ('tile_at', 'seconds_per_call', 1e-6, 2e-6)]
+    assert bench_movement.compare(report(1e-6, 200), baseline) == [
+        ('tile_at', 'peak_bytes_per_call', 100, 200)]
+    assert bench_movement.compare(report(2e-6, 100, calibration=2.0),
+                                  baseline) == []
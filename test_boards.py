@@ -0,0 +1,135 @@
+import copy
+import json
+import os
+
+import pytest
+
+import boards
+from board import Board, Layout, Location
+from boards import BoardDefinitionError
+from Player import suspects
+from sleuth import Sleuth
+
+CLASSIC = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                       'maps', 'classic.json')
+
+
+@pytest.fixture(autouse=True)
+def fresh_boards(monkeypatch):
+    monkeypatch.setattr(boards, '_boards', {})
+
+def classic():
+    with open(CLASSIC) as definition:
+        return json.load(definition)
+
+def write(tmp_path, definition, name='variant.json'):
+    path = str(tmp_path / name)
+    with open(path, 'w') as out:
+        json.dump(definition, out)
+    return path
+
+def test_classic_map_matches_the_board(tmp_path):
+    board = boards.load(CLASSIC, str(tmp_path))
+    layout, expected = board.layout(), Board.layout()
+    assert layout.tiles == expected.tiles
+    assert layout.moves == expected.moves
+    assert layout.nearby == expected.nearby
+    assert layout.rooms == expected.rooms
+    assert layout.starts == expected.starts
+    for start in (Location(9, 0), Location(6, 19)):
+        assert (board.available_destinations(8, start, set()) ==
+                Board.available_destinations(8, start, set()))
+
+def test_rooms_and_starts():
+    assert Board.room_of(Location(4, 6)) == "Kitchen"
+    assert Board.room_of(Location(12, 18)) == "Hall"
+    assert Board.room_of(Location(7, 7)) is None
+    assert len(Board.layout().rooms) == len(Board.layout().doors)
+    for suspect, start in suspects.items():
+        assert Board.start(suspect) == start
+
+def test_compiled_board_is_cached_on_disk(tmp_path, monkeypatch):
+    board = boards.load(CLASSIC, str(tmp_path))
+    assert len(os.listdir(str(tmp_path))) == 1
+    assert boards.load(CLASSIC, str(tmp_path)) is board
+
+    monkeypatch.setattr(boards, '_boards', {})
+    def no_compiling(*args):
+        raise AssertionError("compiled again")
+    monkeypatch.setattr(Layout, '__init__', no_compiling)
+    cached = boards.load(CLASSIC, str(tmp_path))
+    assert cached is not board
+    assert cached.layout().nearby == board.layout().nearby
+    assert (cached.layout().distances.__dict__ ==
+            board.layout().distances.__dict__)
+
+@pytest.mark.parametrize('damage', [
+    lambda data: b'\x80\x04not json',
+    lambda data: data[:len(data) // 2],
+    lambda data: b'{"key": "other", "layout": {}}',
+    lambda data: data.replace(b'"tiles": "', b'"tiles": "AA'),
+    lambda data: json.dumps({'key': json.loads(data)['key'],
+                             'layout': 7}).encode(),
+])
+def test_damaged_cache_is_compiled_again(tmp_path, damage):
+    board = boards.load(CLASSIC, str(tmp_path))
+    path = os.path.join(str(tmp_path), os.listdir(str(tmp_path))[0])
+    with open(path, 'rb') as cached:
+        data = cached.read()
+    with open(path, 'wb') as cached:
+        cached.write(damage(data))
+
+    boards._boards.clear()
+    loaded = boards.load(CLASSIC, str(tmp_path))
+    assert loaded.layout().nearby == board.layout().nearby
+    assert loaded.available_destinations(6, Location(9, 0), set()) == (
+        Board.available_destinations(6, Location(9, 0), set()))
+
+def test_cache_for_another_board_is_not_used(tmp_path):
+    board = boards.load(CLASSIC, str(tmp_path))
+    definition = classic()
+    definition['name'] = 'variant'
+    definition['starts']['Colonel Mustard'] = [1, 7]
+    variant = boards.parse(definition)
+    cached = os.path.join(str(tmp_path), os.listdir(str(tmp_path))[0])
+    with open(cached) as data:
+        data = json.load(data)
+    data['key'] = boards.digest(variant)
+    with open(os.path.join(str(tmp_path), data['key'] + '.json'), 'w') as out:
+        json.dump(data, out)
+
+    loaded = boards.compile_board(variant, str(tmp_path))
+    assert loaded.start("Colonel Mustard") == Location(1, 7)
+
+def test_variant_board(tmp_path):
+    definition = classic()
+    definition['name'] = 'variant'
+    row = list(definition['grid'][7])
+    row[0] = '0'
+    definition['grid'][7] = ''.join(row)
+    definition['starts']['Colonel Mustard'] = [1, 7]
+    board = boards.load(write(tmp_path, definition), None)
+
+    assert not board.is_accessable(Location(0, 7))
+    assert Board.is_accessable(Location(0, 7))
+    game = Sleuth(["Colonel Mustard", "Mrs. White"], board=board)
+    assert game.board() is board
+    assert game.players[0].position == Location(1, 7)
+    assert Sleuth(["Colonel Mustard"]).players[0].position == Location(0, 17)
+
+@pytest.mark.parametrize('change', [
+    lambda definition: definition['grid'].append('0'),
+    lambda definition: definition['grid'].__setitem__(0, '9' * 24),
+    lambda definition: definition['rooms']['Kitchen'].append([0, 0]),
+    lambda definition: definition['rooms'].pop('Kitchen'),
+    lambda definition: definition['rooms'].__setitem__('Attic', [[4, 6]]),
+    lambda definition: definition['starts'].pop('Mrs. White'),
+    lambda definition: definition['starts'].__setitem__('Mrs. White', [0, 0]),
+    lambda definition: definition['starts'].__setitem__('Mrs. White', [99, 0]),
+    lambda definition: definition.pop('grid'),
+])
+def test_bad_definitions(tmp_path, change):
+    definition = copy.deepcopy(classic())
+    change(definition)
+    with pytest.raises(BoardDefinitionError):
+        boards.load(write(tmp_path, definition), None)
@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from cards import CARDS, ROOMS, SUSPECTS, WEAPONS
+from deduction import ContradictionError, Deduction
+from sleuth import Sleuth
+
+
+def assert_sound(deduction, game):
+    for i, player in enumerate(game.players):
+        assert deduction.known(i) <= player.hand
+        assert player.hand <= deduction.possible(i)
+    assert deduction.known(deduction.solution) <= game.solution
+    assert game.solution <= deduction.possible(deduction.solution)
+
+@pytest.mark.parametrize('seed', range(5))
+def test_deductions_follow_the_game(seed):
+    rng = random.Random(seed)
+    game = Sleuth(["Mr. Green", "Miss Scarlet", "Ms. Peacock", "Mrs. White"],
+                  rng)
+    me = game.players[0]
+    deduction = Deduction.for_player(game, me)
+    assert_sound(deduction, game)
+
+    for turn in range(60):
+        suggester = game.players[turn % len(game.players)]
+        cards = [rng.choice(WEAPONS), rng.choice(ROOMS), rng.choice(SUSPECTS)]
+        refuter, held = game.refute(suggester, cards)
+        shown = rng.choice(sorted(held)) if suggester is me and held else None
+        deduction.suggestion(
+            game.players.index(suggester), cards,
+            None if refuter is None else game.players.index(refuter), shown)
+        assert_sound(deduction, game)
+
+    assert deduction.solved() in (None, game.solution)
+    assert len(deduction.known(1)) > 0
+
+def test_last_card_of_a_category_is_the_solution():
+    deduction = Deduction([6, 6, 6])
+    deduction.does_not_hold(deduction.solution, WEAPONS[1:])
+    assert deduction.known(deduction.solution) == {WEAPONS[0]}
+    assert WEAPONS[0] not in deduction.possible(0)
+
+def test_refuted_clause_resolves():
+    deduction = Deduction([9, 9])
+    deduction.suggestion(0, [WEAPONS[0], ROOMS[0], SUSPECTS[0]], refuter=1)
+    assert deduction.known(1) == set()
+    deduction.does_not_hold(1, [WEAPONS[0], ROOMS[0]])
+    assert deduction.known(1) == {SUSPECTS[0]}
+
+def test_full_hand_rules_out_everything_else():
+    deduction = Deduction([2, 2, 2, 2, 2, 2, 2, 2, 2])
+    deduction.holds(0, [WEAPONS[0], ROOMS[0]])
+    assert deduction.possible(0) == {WEAPONS[0], ROOMS[0]}
+
+def test_contradiction():
+    deduction = Deduction([9, 9])
+    deduction.holds(0, [WEAPONS[0]])
+    with pytest.raises(ContradictionError):
+        deduction.holds(1, [WEAPONS[0]])
+
+def test_too_many_cards_in_a_hand():
+    with pytest.raises(ContradictionError):
+        Deduction([6, 6, 6]).holds(0, CARDS[:8])
+
+def test_too_few_cards_left_for_a_hand():
+    with pytest.raises(ContradictionError):
+        Deduction([6, 6, 6]).does_not_hold(0, CARDS[:18])
+
+def test_two_solution_cards_of_a_category():
+    deduction = Deduction([6, 6, 6])
+    with pytest.raises(ContradictionError):
+        deduction.holds(deduction.solution, WEAPONS[:2])
@@ -0,0 +1,129 @@
+import random
+
+import pytest
+
+from cards import CARDS, ROOMS, SUSPECTS, WEAPONS
+from deduction import Deduction
+from estimator import EstimateTimeout, SolutionEstimator
+from sleuth import Sleuth
+
+PLAYERS = ["Mrs. White", "Mr. Green", "Miss Scarlet", "Professor Plum",
+           "Colonel Mustard", "Ms. Peacock"]
+
+
+def played_game(seed, turns):
+    rng = random.Random(seed)
+    game = Sleuth(PLAYERS, rng)
+    deduction = Deduction.for_player(game, game.players[0])
+    for turn in range(turns):
+        suggester = game.players[turn % len(game.players)]
+        cards = [rng.choice(WEAPONS), rng.choice(ROOMS), rng.choice(SUSPECTS)]
+        refuter, _ = game.refute(suggester, cards)
+        deduction.suggestion(
+            game.players.index(suggester), cards,
+            None if refuter is None else game.players.index(refuter))
+    return game, deduction
+
+def consistent(deduction, deal):
+    return (all(not mask & lacks for mask, lacks in
+                zip(deal, deduction.lacks)) and
+            all(deal[holder] & mask for holder, mask in deduction.clauses))
+
+def estimate(deduction, seed=1, **options):
+    options.setdefault('time_limit', None)
+    return SolutionEstimator(deduction, random.Random(seed)).estimate(
+        **options)
+
+def test_each_category_sums_to_one():
+    game, deduction = played_game(0, 0)
+    chances = estimate(deduction)
+    for cards in (WEAPONS, ROOMS, SUSPECTS):
+        assert sum(chances[card] for card in cards) == pytest.approx(1)
+    for card in game.players[0].hand:
+        assert chances[card] == 0
+    free = [card for card in SUSPECTS if card not in game.players[0].hand]
+    for card in free:
+        assert chances[card] == pytest.approx(1.0 / len(free), abs=0.1)
+
+def test_known_solution_card_is_certain():
+    _, deduction = played_game(0, 0)
+    deduction.holds(deduction.solution, [ROOMS[2]])
+    chances = estimate(deduction)
+    assert chances[ROOMS[2]] == 1
+    assert all(chances[card] == 0 for card in ROOMS if card != ROOMS[2])
+
+@pytest.mark.parametrize('seed', range(3))
+def test_sampled_deals_agree_with_the_facts(seed):
+    game, deduction = played_game(seed, 15)
+    estimator = SolutionEstimator(deduction, random.Random(seed))
+    order = estimator._order()
+    for _ in range(200):
+        draw = estimator._draw(order)
+        if draw is not None:
+            assert consistent(deduction, draw[0])
+            assert all(bin(mask).count('1') == size for mask, size in
+                       zip(draw[0], deduction.hand_sizes))
+    for card in game.solution:
+        assert estimate(deduction, seed)[card] > 0
+
+def test_chain_agrees_with_weighted_deals():
+    _, deduction = played_game(3, 15)
+    weighted = estimate(deduction, samples=4000, tolerance=0.01)
+    estimator = SolutionEstimator(deduction, random.Random(2))
+    chain = estimator.estimate(samples=4000, tolerance=0.01,
+                               min_acceptance=1.1, time_limit=None)
+    assert estimator.method == 'chain'
+    for card in CARDS:
+        assert chain[card] == pytest.approx(weighted[card], abs=0.08)
+
+def test_estimate_is_reproducible():
+    _, deduction = played_game(4, 10)
+    assert estimate(deduction, 7) == estimate(deduction, 7)
+
+def test_estimate_stops_early():
+    _, deduction = played_game(0, 0)
+    estimator = SolutionEstimator(deduction, random.Random(0))
+    estimator.estimate(samples=5000, tolerance=0.05, time_limit=None)
+    assert estimator.samples < 5000
+
+@pytest.mark.parametrize('seed', range(6))
+def test_chain_starts_from_a_consistent_deal(seed):
+    _, deduction = played_game(seed, 10)
+    deal = SolutionEstimator(deduction, random.Random(seed))._start()
+    assert consistent(deduction, deal)
+    assert all(bin(mask).count('1') == size for mask, size in
+               zip(deal, deduction.hand_sizes))
+
+class Clock(object):
+    """A clock which moves on by step seconds every time it is read"""
+
+    def __init__(self, step):
+        self.now = 0.0
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+def test_estimate_stops_at_the_deadline():
+    # Hardly any weighted deals of this game agree with the facts
+    _, deduction = played_game(16, 10)
+    clock = Clock(0.001)
+    estimator = SolutionEstimator(deduction, random.Random(0), clock)
+    estimator.estimate(time_limit=0.05, min_samples=1)
+    assert estimator.method == 'chain'
+    assert 0.05 < clock.now <= 0.06
+    assert estimator.effective >= 1
+
+def test_estimate_raises_when_too_few_deals_are_counted():
+    _, deduction = played_game(16, 10)
+    estimator = SolutionEstimator(deduction, random.Random(0), Clock(0.001))
+    with pytest.raises(EstimateTimeout):
+        estimator.estimate(time_limit=0.005, min_samples=10)
+
+def test_chain_start_stops_at_the_deadline():
+    _, deduction = played_game(16, 10)
+    estimator = SolutionEstimator(deduction, random.Random(0), Clock(1.0))
+    with pytest.raises(EstimateTimeout):
+        estimator._start(deadline=0.5)
+    assert consistent(deduction, estimator._start(deadline=None))
@@ -0,0 +1,108 @@
+import random
+
+import pytest
+
+import eventlog
+from board import Board
+from cards import ROOMS, SUSPECTS, WEAPONS
+from eventlog import EventLog, EventLogError, EventReader, GameRecorder
+from sleuth import Sleuth
+
+PLAYERS = ["Mr. Green", "Miss Scarlet", "Ms. Peacock", "Mrs. White"]
+
+
+def state(game):
+    return ([player.character for player in game.players],
+            [player.position for player in game.players],
+            [player.hand_mask for player in game.players],
+            game.solution_mask, game.turn, list(game.history))
+
+def play(recorder, rng, turns):
+    """Play random turns, returning the state after every event"""
+    game = recorder.game
+    states = [state(game)]
+    for turn in range(turns):
+        player = turn % len(game.players)
+        roll = rng.randint(2, 12)
+        recorder.roll(player, roll)
+        states.append(state(game))
+        destinations = Board.available_destinations(
+            roll, game.players[player].position, set())
+        recorder.move(player, rng.choice(sorted(destinations)))
+        states.append(state(game))
+        if turn % 3 == 0:
+            recorder.suggest(player, [rng.choice(WEAPONS), rng.choice(ROOMS),
+                                      rng.choice(SUSPECTS)])
+            states.extend([state(game)] * 2)
+    recorder.accuse(0, ["Rope", "Hall", "Mr. Green"])
+    states.append(state(game))
+    return states
+
+@pytest.fixture
+def logged(tmp_path):
+    path = str(tmp_path / 'games.log')
+    rng = random.Random(5)
+    states = {}
+    with EventLog(path) as log:
+        recorders = [GameRecorder(log, game_id,
+                                  Sleuth(PLAYERS, random.Random(game_id)),
+                                  snapshot_every=7)
+                     for game_id in (11, 12)]
+        for recorder in recorders:
+            states[recorder.game_id] = play(recorder, rng, 12)
+    return path, states
+
+def test_replay_every_event(logged):
+    path, states = logged
+    with EventReader(path) as reader:
+        assert reader.games() == [11, 12]
+        for game_id, expected in states.items():
+            for events in range(1, len(expected) + 1):
+                assert state(reader.replay(game_id, events)) == (
+                    expected[events - 1])
+            assert state(reader.replay(game_id)) == expected[-1]
+
+def test_snapshots_are_written(logged):
+    path, states = logged
+    with EventReader(path) as reader:
+        kinds = [record.kind for record in reader.records(11)]
+    assert kinds[0] == eventlog.DEAL
+    assert kinds.count(eventlog.SNAPSHOT) == (len(states[11]) - 1) // 7
+
+def test_replay_starts_from_a_snapshot(logged, monkeypatch):
+    path, states = logged
+    applied = []
+    real_apply = eventlog.apply
+    monkeypatch.setattr(eventlog, 'apply', lambda game, record: (
+        applied.append(record.kind) or real_apply(game, record)))
+    with EventReader(path) as reader:
+        game = reader.replay(12, 16)
+    assert state(game) == states[12][15]
+    assert len(applied) == 16 - 14
+
+def test_truncated_log(logged):
+    path, _ = logged
+    with open(path, 'rb') as log:
+        data = log.read()
+    with open(path, 'wb') as log:
+        log.write(data[:-3])
+    with EventReader(path) as reader:
+        with pytest.raises(EventLogError):
+            list(reader.records())
+
+def test_empty_log(tmp_path):
+    path = str(tmp_path / 'empty.log')
+    EventLog(path).close()
+    with EventReader(path) as reader:
+        assert reader.games() == []
+        with pytest.raises(EventLogError):
+            reader.replay(1)
+
+def test_records_outlive_the_reader(logged):
+    path, _ = logged
+    with EventReader(path) as reader:
+        records = list(reader.records())
+    assert records[0].kind == eventlog.DEAL
+    assert bytes(records[0].payload)
+    assert list(reader.records()) == []
+    reader.close()
@@ -0,0 +1,72 @@
+import json
+import os
+
+import boards
+
+from board import Board, Location
+from profiling import BoardProfiler, Histogram
+
+CLASSIC = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                       'maps', 'classic.json')
+
+
+def test_histogram():
+    histogram = Histogram()
+    for value in (1, 2, 3, 4, 5, 100):
+        histogram.add(value)
+    assert histogram.to_dict() == {'count': 6, 'total': 115, 'min': 1,
+                                   'max': 100,
+                                   'buckets': {'1': 1, '2': 1, '4': 2,
+                                               '8': 1, '128': 1}}
+
+def test_disabled_profiler_leaves_board_alone():
+    originals = dict(Board.__dict__)
+    profiler = BoardProfiler()
+    with profiler:
+        assert Board.__dict__['tile_at'] is not originals['tile_at']
+    assert dict(Board.__dict__) == originals
+    assert profiler.stats() == {}
+
+def test_profiler_counts(tmpdir):
+    cache = Board.destination_cache()
+    maxsize = cache.maxsize
+    cache.resize(0)
+    try:
+        with BoardProfiler() as profiler:
+            destinations = Board.available_destinations(
+                4, Location(9, 0), set())
+            Board.door_accessable(Location(4, 7), Location(4, 6))
+    finally:
+        cache.resize(maxsize)
+    assert destinations == Board.available_destinations(
+        4, Location(9, 0), set())
+
+    stats = profiler.stats()
+    assert stats['available_destinations']['calls'] == 1
+    assert stats['available_destinations']['max_depth'] == 0
+    assert stats['_destinations']['max_depth'] == 1
+    assert stats['_expand']['calls'] == 4
+    assert stats['_expand']['max_depth'] == 2
+    assert (stats['available_destinations']['nodes']['total'] ==
+            stats['_expand']['nodes']['total'] > 0)
+    assert stats['door_accessable']['max_depth'] == 0
+    assert stats['tile_at']['max_depth'] == 1
+    assert stats['tile_at']['calls'] == 1
+    assert stats['tile_at']['seconds']['count'] == 1
+
+    path = str(tmpdir.join('stats.json'))
+    profiler.dump(path)
+    with open(path) as dumped:
+        assert json.load(dumped) == stats
+    profiler.reset()
+    assert profiler.stats() == {}
+
+def test_profile_a_loaded_board():
+    board = boards.load(CLASSIC, cache_dir=None)
+    tile_at = Board.__dict__['tile_at']
+    with BoardProfiler(board) as profiler:
+        board.tile_at(Location(7, 8))
+        Board.tile_at(Location(7, 8))
+        assert Board.__dict__['tile_at'] is tile_at
+    assert 'tile_at' not in board.__dict__
+    assert profiler.stats()['tile_at']['calls'] == 1
@@ -0,0 +1,48 @@
+import random
+
+import pytest
+
+from board import Board, Location
+from Player import suspects
+from reachability import IncrementalReachability
+
+
+def assert_up_to_date(reachability):
+    for player, position in reachability.positions.items():
+        others = {other for name, other in reachability.positions.items()
+                  if name != player}
+        for roll in range(reachability.max_roll + 1):
+            assert (reachability.destinations(player, roll) ==
+                    Board.available_destinations(roll, position, others))
+
+def test_starting_positions():
+    assert_up_to_date(IncrementalReachability(suspects))
+
+def test_moves_keep_destinations_up_to_date():
+    rng = random.Random(7)
+    reachability = IncrementalReachability(suspects)
+    for turn in range(12):
+        player = rng.choice(sorted(reachability.positions))
+        destinations = reachability.destinations(player, rng.randint(2, 12))
+        reachability.move(player, rng.choice(sorted(destinations)))
+        assert_up_to_date(reachability)
+
+def test_distant_move_leaves_others_alone():
+    reachability = IncrementalReachability(
+        {'a': Location(9, 0), 'b': Location(23, 19)}, max_roll=6)
+    expanded = reachability.layers_expanded
+    reachability.move('a', Location(9, 1))
+    assert reachability.layers_expanded == expanded + 6
+
+def test_nearby_move_redoes_later_layers_only():
+    reachability = IncrementalReachability(
+        {'a': Location(7, 8), 'b': Location(12, 8)}, max_roll=6)
+    expanded = reachability.layers_expanded
+    reachability.move('b', Location(11, 8))
+    assert reachability.layers_expanded == expanded + 6 + 3
+    assert_up_to_date(reachability)
+
+def test_roll_out_of_range():
+    reachability = IncrementalReachability(suspects, max_roll=4)
+    with pytest.raises(ValueError):
+        reachability.destinations('Mr. Green', 5)
@@ -0,0 +1,138 @@
+import asyncio
+import json
+
+from board import Board, Location
+from loadgen import GameClient, generate, percentile
+from server import GameServer
+
+PLAYERS = ["Mr. Green", "Miss Scarlet", "Ms. Peacock"]
+
+
+def run_with_server(test, **options):
+    # Tests play fixed games
+    options.setdefault('allow_seed', True)
+
+    async def run():
+        server = GameServer(**options)
+        port = await server.start()
+        client = await GameClient.connect('127.0.0.1', port)
+        try:
+            return await test(server, client, port)
+        finally:
+            await client.close()
+            await server.close()
+    return asyncio.run(run())
+
+def test_a_turn():
+    async def test(server, client, port):
+        game = (await client.request('new', suspects=PLAYERS, seed=1))['game']
+        assert (await client.request('roll', game=game, player=1))['ok'] is False
+
+        rolled = await client.request('roll', game=game, player=0)
+        assert rolled['ok'] and 2 <= rolled['roll'] <= 12
+        start = Location(14, 0)
+        assert set(map(tuple, rolled['destinations'])) == (
+            Board.available_destinations(
+                rolled['roll'], start, {Location(7, 24), Location(23, 6)}))
+
+        moved = await client.request('move', game=game, player=0, to=[0, 0])
+        assert moved['ok'] is False
+        to = rolled['destinations'][0]
+        moved = await client.request('move', game=game, player=0, to=to)
+        assert moved['ok'] and moved['position'] == to
+
+        state = await client.request('state', game=game)
+        assert state['positions'][0] == to
+        assert state['player'] == (0 if moved['door'] else 1)
+    run_with_server(test)
+
+def test_wrong_accusation_eliminates():
+    async def test(server, client, port):
+        game = (await client.request('new', suspects=PLAYERS, seed=2))['game']
+        solution = sorted(card.name for card in server.games[game].game.solution)
+        wrong = await client.request('accuse', game=game, player=0,
+                                     cards=['Rope', 'Hall', 'Mrs. White'])
+        if not wrong['correct']:
+            assert (await client.request('state', game=game))['player'] == 1
+        right = await client.request('accuse', game=game, player=1,
+                                     cards=solution)
+        assert right['correct'] and right['winner'] == 1
+        state = await client.request('state', game=game)
+        assert state['phase'] == 'over'
+    run_with_server(test)
+
+def test_requests_for_one_game_take_turns():
+    async def test(server, client, port):
+        game = (await client.request('new', suspects=PLAYERS, seed=3))['game']
+        replies = await asyncio.gather(*[
+            client.request('roll', game=game, player=0) for _ in range(5)])
+        assert sum(reply['ok'] for reply in replies) == 1
+    run_with_server(test)
+
+def test_pipelined_requests_beyond_the_limit():
+    async def test(server, client, port):
+        replies = await asyncio.gather(*[
+            client.request('new', suspects=PLAYERS, seed=seed)
+            for seed in range(20)])
+        assert all(reply['ok'] for reply in replies)
+        assert len(server.games) == 20
+    run_with_server(test, max_pending=2)
+
+def test_bad_requests():
+    async def test(server, client, port):
+        assert (await client.request('fly'))['ok'] is False
+        assert (await client.request('state', game=99))['ok'] is False
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'not json\n')
+        reply = json.loads(await reader.readline())
+        assert reply['ok'] is False
+        writer.close()
+    run_with_server(test)
+
+def test_new_game_needs_suspects():
+    async def test(server, client, port):
+        for suspects in ([], None, "Mr. Green", ["Mr. Green", "Mr. Green"],
+                         ["Mr. Nobody"], [1, 2], PLAYERS * 3):
+            reply = await client.request('new', suspects=suspects)
+            assert reply['ok'] is False
+        assert not server.games
+        assert (await client.request('new', suspects=PLAYERS[:1]))['ok']
+    run_with_server(test)
+
+def test_unexpected_errors_are_answered(monkeypatch):
+    async def test(server, client, port):
+        def broken(*args):
+            raise ZeroDivisionError("broken")
+        monkeypatch.setattr('server.GameSession', broken)
+        reply = await client.request('new', suspects=PLAYERS)
+        assert reply['ok'] is False and 'ZeroDivisionError' in reply['error']
+    run_with_server(test)
+
+def test_seeds_need_allowing():
+    async def test(server, client, port):
+        reply = await client.request('new', suspects=PLAYERS, seed=1)
+        assert reply['ok'] is False
+        assert (await client.request('new', suspects=PLAYERS))['ok']
+    run_with_server(test, allow_seed=False)
+
+def test_games_close_with_their_connection():
+    async def test(server, client, port):
+        other = await GameClient.connect('127.0.0.1', port)
+        game = (await other.request('new', suspects=PLAYERS))['game']
+        kept = (await client.request('new', suspects=PLAYERS))['game']
+        assert (await client.request('state', game=game))['ok']
+        await other.close()
+        for _ in range(100):
+            if game not in server.games:
+                break
+            await asyncio.sleep(0.01)
+        assert list(server.games) == [kept]
+    run_with_server(test)
+
+def test_load_generator():
+    async def test(server, client, port):
+        return await generate('127.0.0.1', port, connections=3, games=4,
+                              turns=5, players=PLAYERS, seeded=True)
+    latencies = run_with_server(test)
+    assert len(latencies) == 3 * 4 * 5
+    assert percentile(latencies, 50) <= percentile(latencies, 99)
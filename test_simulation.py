@@ -0,0 +1,11 @@
+from simulation import play_game, simulate
+
+
+def test_play_game_is_deterministic():
+    assert play_game(4, seed=9) == play_game(4, seed=9)
+    assert play_game(4, seed=9) != play_game(5, seed=9)
+
+def test_simulate_matches_sequential_play():
+    results = sorted(simulate(6, seed=2, processes=2))
+    assert results == [play_game(index, seed=2) for index in range(6)]
+    assert all(result.winner is not None for result in results)
@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+import snapshot
+from board import Location
+from sleuth import Sleuth
+
+PLAYERS = ["Mrs. White", "Mr. Green", "Miss Scarlet", "Professor Plum",
+           "Colonel Mustard", "Ms. Peacock"]
+
+
+def played_game(seed):
+    game = Sleuth(PLAYERS, random.Random(seed))
+    game.players[2].position = Location(8, 9)
+    game.turn = 3
+    game.refute(game.players[0], ["Rope", "Hall", "Mr. Green"])
+    game.refute(game.players[1], ["Knife", "Study", "Ms. Peacock"])
+    return game
+
+def assert_same(game, restored):
+    assert [player.character for player in restored.players] == (
+        [player.character for player in game.players])
+    assert [player.position for player in restored.players] == (
+        [player.position for player in game.players])
+    assert [player.hand for player in restored.players] == (
+        [player.hand for player in game.players])
+    assert restored.solution == game.solution
+    assert restored.turn == game.turn
+    assert restored.history == game.history
+
+@pytest.mark.parametrize('seed', range(3))
+def test_round_trip(seed):
+    game = played_game(seed)
+    data = snapshot.dumps(game)
+    assert len(data) == snapshot.size(game) == 51 + 6 * 2
+    assert_same(game, snapshot.loads(data))
+
+def test_unrefuted_suggestion():
+    game = Sleuth(PLAYERS[:3], random.Random(0))
+    game.history.append((1, 7, None))
+    assert snapshot.loads(snapshot.dumps(game)).history == [(1, 7, None)]
+
+def test_read_from_a_larger_buffer():
+    games = [played_game(seed) for seed in range(3)]
+    buffer = bytearray(sum(snapshot.size(game) for game in games))
+    offset = 0
+    for game in games:
+        offset = snapshot.dump_into(game, buffer, offset)
+
+    view, offset = memoryview(buffer), 0
+    for game in games:
+        restored, offset = snapshot.load_from(view, offset)
+        assert_same(game, restored)
+    assert offset == len(buffer)
+
+def test_bad_snapshots():
+    data = snapshot.dumps(played_game(0))
+    with pytest.raises(snapshot.SnapshotError):
+        snapshot.loads(data[:20])
+    with pytest.raises(snapshot.SnapshotError):
+        snapshot.loads(b'\x09' + data[1:])
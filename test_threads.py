@@ -0,0 +1,84 @@
+import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from board import Board, DestinationCache, Location
+from grid import grid
+
+STARTS = [Location(x, y) for y, row in enumerate(grid)
+          for x, tile in enumerate(row) if tile][::7]
+EXCLUDES = [frozenset(), frozenset({Location(8, 8), Location(6, 9)}),
+            frozenset({Location(16, 16), Location(9, 1)})]
+QUERIES = [(roll, start, exclude) for roll in range(1, 9)
+           for start in STARTS for exclude in EXCLUDES]
+
+
+def test_destinations_from_many_threads(monkeypatch):
+    monkeypatch.setattr(Board, '_cache', DestinationCache(maxsize=64))
+    expected = [Board.available_destinations(*query) for query in QUERIES]
+    Board.destination_cache().clear()
+
+    def hammer(offset):
+        # Each thread walks the queries from a different place, so the
+        # threads fill and evict their caches at different times.
+        order = QUERIES[offset:] + QUERIES[:offset]
+        return [Board.available_destinations(*query)
+                for query in order for _ in range(2)][::2]
+
+    threads = 8
+    with ThreadPoolExecutor(threads) as pool:
+        results = list(pool.map(hammer, [i * 37 for i in range(threads)]))
+        # Counted while the threads are still running
+        cache = Board.destination_cache()
+        assert cache.hits + cache.misses == threads * len(QUERIES) * 2
+    for i, result in enumerate(results):
+        offset = i * 37
+        assert result == expected[offset:] + expected[:offset]
+
+def test_cache_stores_are_per_thread():
+    cache = DestinationCache(maxsize=4)
+    layout = Board.layout()
+    cache.get(layout, 'key')
+    cache.put(layout, 'key', frozenset())
+
+    seen = []
+    def other():
+        seen.append(cache.get(layout, 'key'))
+        cache.get(layout, 'key')
+    thread = threading.Thread(target=other)
+    thread.start()
+    thread.join()
+
+    assert seen == [None]
+    assert cache.get(layout, 'key') == frozenset()
+    cache.clear()
+    assert cache.stats() == {'size': 0, 'maxsize': 4, 'hits': 0,
+                             'misses': 0, 'evictions': 0}
+    assert cache.get(layout, 'key') is None
+
+def test_layout_cannot_be_changed():
+    layout = Board.layout()
+    with pytest.raises(AttributeError):
+        layout.width = 3
+    with pytest.raises(TypeError):
+        layout.tiles[0] = 1
+    with pytest.raises(TypeError):
+        layout.rooms[0] = "Kitchen"
+    with pytest.raises(TypeError):
+        layout.starts["Mrs. White"] = 0
+    with pytest.raises(TypeError):
+        layout.room_distances["Hall", "Study"] = 0
+    table = layout.distances
+    with pytest.raises(AttributeError):
+        table.size = 0
+    with pytest.raises(TypeError):
+        table._table[0] = 0
+    with pytest.raises(TypeError):
+        table.index[0] = 0
+
+    copy = pickle.loads(pickle.dumps(layout, pickle.HIGHEST_PROTOCOL))
+    assert copy.rooms == layout.rooms
+    with pytest.raises(TypeError):
+        copy.rooms[0] = "Kitchen"
@@ -0,0 +1,34 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from board import Board, Location, MAX_ROLL
+from vectorized import reachability
+
+
+def expected_destinations(tiles, exclude):
+    requests = [(start, roll, exclude)
+                for start in tiles for roll in range(MAX_ROLL + 1)]
+    return Board.batch_destinations(requests)
+
+@pytest.mark.parametrize('exclude', [
+    frozenset(),
+    frozenset({Location(8, 8), Location(16, 17), Location(7, 4)}),
+])
+def test_reachability_matches_board(exclude):
+    tensor = reachability(exclude=exclude)
+    assert tensor.reach.shape == (len(tensor.tiles), MAX_ROLL + 1,
+                                  len(tensor.tiles))
+    assert not exclude.intersection(tensor.tiles)
+
+    expected = expected_destinations(tensor.tiles, exclude)
+    for start in tensor.tiles:
+        for roll in range(MAX_ROLL + 1):
+            assert (tensor.destinations(roll, start) ==
+                    expected[start, roll, exclude])
+
+def test_reachability_short_rolls():
+    tensor = reachability(max_roll=2)
+    assert tensor.max_roll == 2
+    assert tensor.destinations(1, Location(9, 8)) == {
+        Location(9, 7), Location(8, 8), Location(10, 8), Location(9, 9)}
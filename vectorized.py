@@ -0,0 +1,160 @@
+"""Reachability from every tile of the board at once, using NumPy
+
+NumPy is only needed by this module; the rest of the game does not depend
+on it. Instead of asking Board.available_destinations about one start and
+one roll at a time, reachability() walks out from every accessable tile
+together and returns a dense (start x roll x tile) tensor.
+
+The search follows the same rules as the Board. A move may not walk over a
+tile twice, so the search keeps every distinct partial move as a row of
+(start, tile, walked tiles), with the walked tiles packed into 64 bit words.
+Each step shifts every row in the four directions at once through
+per-direction step tables, in which door tiles can only be entered along
+their own axis. Walked tiles that are out of reach of the remaining roll are
+masked off and identical rows are merged, as in Board._layers.
+"""
+import numpy as np
+
+from board import Board, MAX_ROLL
+
+
+class ReachabilityTensor(object):
+    """The result of reachability()
+
+    reach[s, r, t] is True when a player on tiles[s] who rolls r may end
+    the move on tiles[t]. Rolls run from 0 to max_roll and tiles holds the
+    Location of each accessable tile.
+    """
+
+    def __init__(self, tiles, reach):
+        self.tiles = tiles
+        self.reach = reach
+        self.index = dict((tile, i) for i, tile in enumerate(tiles))
+
+    @property
+    def max_roll(self):
+        return self.reach.shape[1] - 1
+
+    def destinations(self, roll, start_location):
+        """Return the set of destinations for a start and roll"""
+        row = self.reach[self.index[start_location], roll]
+        return {self.tiles[i] for i in np.flatnonzero(row)}
+
+
+def reachability(max_roll=MAX_ROLL, exclude=(), board=Board):
+    """Determine where a player on any tile may move with any roll
+
+    Tiles in exclude may not be walked over or landed on, as with
+    Board.available_destinations. Returns a ReachabilityTensor.
+    """
+    layout = board.layout()
+    excluded = _excluded(layout, exclude)
+    numbers = [number for number, tile in enumerate(layout.tiles)
+               if tile and number not in excluded]
+    size = len(numbers)
+    index = dict((number, i) for i, number in enumerate(numbers))
+    words = (size + 63) // 64
+
+    steps = _step_tables(layout, numbers, index)
+    doors = np.array([number in layout.doors for number in numbers])
+    nearby = _nearby_masks(layout, numbers, index, max_roll, words)
+
+    reach = np.zeros((size, max_roll + 1, size), dtype=bool)
+    reach[np.arange(size), 0, np.arange(size)] = True
+    entered = np.zeros_like(reach)
+
+    starts = np.arange(size)
+    tiles = np.arange(size)
+    walked = np.zeros((size, words), dtype=np.uint64)
+    for roll in range(1, max_roll + 1):
+        remaining = max_roll - roll
+        walked = walked.copy()
+        walked[np.arange(len(tiles)), tiles >> 6] |= _bits(tiles)
+
+        next_starts, next_tiles, next_walked = [], [], []
+        for step in steps:
+            targets = step[tiles]
+            legal = targets >= 0
+            free = _bit_clear(walked[legal], targets[legal])
+            rows = np.flatnonzero(legal)[free]
+            targets = targets[rows]
+
+            door = doors[targets]
+            entered[starts[rows[door]], roll, targets[door]] = True
+
+            rows, targets = rows[~door], targets[~door]
+            next_starts.append(starts[rows])
+            next_tiles.append(targets)
+            next_walked.append(walked[rows] & nearby[targets, remaining])
+
+        states = _unique_rows(np.column_stack([
+            np.concatenate(next_starts).astype(np.uint64),
+            np.concatenate(next_tiles).astype(np.uint64),
+            np.concatenate(next_walked)]))
+        starts = states[:, 0].astype(np.intp)
+        tiles = states[:, 1].astype(np.intp)
+        walked = states[:, 2:]
+        reach[starts, roll, tiles] = True
+
+    reach[:, 1:] |= np.logical_or.accumulate(entered[:, 1:], axis=1)
+    return ReachabilityTensor([layout.location(number) for number in numbers],
+                              reach)
+
+
+def _excluded(layout, exclude):
+    return {y * layout.width + x for x, y in exclude
+            if 0 <= x < layout.width and 0 <= y < layout.height}
+
+
+def _step_tables(layout, numbers, index):
+    """Return the West, East, North and South step tables
+
+    Each table maps the index of a tile to the index of the tile one step in
+    that direction, or to -1 if that step is not a legal move.
+    """
+    offsets = (-1, 1, -layout.width, layout.width)
+    steps = np.full((len(offsets), len(numbers)), -1, dtype=np.intp)
+    for i, number in enumerate(numbers):
+        for step in layout.moves[number]:
+            if step in index:
+                steps[offsets.index(step - number), i] = index[step]
+    return steps
+
+
+def _nearby_masks(layout, numbers, index, max_roll, words):
+    """Return packed masks of the tiles within each distance of each tile
+
+    Distances are those of the whole board, so they never overstate how far
+    away a tile is when some tiles are excluded.
+    """
+    size = len(numbers)
+    distances = np.full((size, size), max_roll + 1, dtype=np.int32)
+    for i, number in enumerate(numbers):
+        for other, distance in layout.distances.row(number):
+            if other in index:
+                distances[i, index[other]] = distance
+
+    within = distances[:, None, :] <= np.arange(max_roll + 1)[None, :, None]
+    packed = np.packbits(within, axis=-1, bitorder='little')
+    padded = np.zeros(packed.shape[:-1] + (words * 8,), dtype=np.uint8)
+    padded[..., :packed.shape[-1]] = packed
+    return padded.view('<u8')
+
+
+def _unique_rows(rows):
+    """Return the distinct rows of a two dimensional array"""
+    if not len(rows):
+        return rows
+    rows = rows[np.lexsort(rows.T[::-1])]
+    distinct = np.ones(len(rows), dtype=bool)
+    distinct[1:] = np.any(rows[1:] != rows[:-1], axis=1)
+    return rows[distinct]
+
+
+def _bits(tiles):
+    return np.left_shift(np.uint64(1), (tiles & 63).astype(np.uint64))
+
+
+def _bit_clear(walked, tiles):
+    word = walked[np.arange(len(tiles)), tiles >> 6]
+    return (word & _bits(tiles)) == 0